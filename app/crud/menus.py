@@ -1,5 +1,6 @@
-from typing import Optional
+from typing import Optional, Tuple
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.schemas.menus import MenuResponse
@@ -7,3 +8,11 @@ from app.models.menus import Menu
 
 def get_menu_by_place_id(db: Session, place_id: int) -> Optional[MenuResponse]:
     return db.query(Menu).filter(Menu.place_id == place_id).all()
+
+
+def get_menu_version(db: Session, place_id: int) -> Tuple:
+    return tuple(
+        db.query(func.count(Menu.id), func.max(Menu.id), func.sum(Menu.version))
+        .filter(Menu.place_id == place_id)
+        .one()
+    )
@@ -1,10 +1,12 @@
 import numpy as np
 
-from typing import List, Optional
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
-from sqlalchemy import desc, asc, literal, or_
+from sqlalchemy import desc, asc, or_, and_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case
+from sqlalchemy import func, case, select, insert
 
 from app.schemas.places import (
     BasicPlaceInfoResponse,
@@ -15,19 +17,45 @@ from app.schemas.places import (
     ContentBasedRecommedRequest,
     CollaborativeBasedRecommendRequest
 )
-from app.models.places import Place, NaverPlace, KakaoPlace
+from app.models.places import Place, NaverPlace, KakaoPlace, PlaceRanking
+from app.models.categories import Category
+from app.models.reviews import PlaceReviewSummary
 from app.models.users import User
 from app.models.visitedplaces import VisitedPlace
-from app.dependencies import getSeason, isWeekend, getCategoryCode, getHaversine, getCategoryName
+from app.crud.reviews import SCORE_BUCKETS, to_review_summary
+from app.utils.cache import VersionedPlaceDetails, place_cache, invalidate_places
+from app.utils.cluster import ClusterRecommendTable
+from app.utils.content import PlaceFeatures
+from app.utils.collaborative import EmbeddingScorer, PlaceUniverse, top_k_indices
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.visit_buffer import visit_buffer
+from app.dependencies import getSeason, isWeekend, getCategoryCode, getCategoryName
+
+
+def get_place_by_id(db: Session, place_id: int, version: Optional[str] = None) -> Optional[PlaceDetailsResponse]:
+    """
+    With a `version` (the ETag of `get_place_version`), the cached details are
+    only used if they were built for that same version. Rows written without
+    `invalidate_places`, e.g. by the Naver/Kakao loader, change the version and
+    so cannot leave an older body behind a newer ETag.
+    """
+    if version is None:
+        return get_places_details(db, [place_id])[0]
+
+    key = f"versioned:{place_id}"
+    entry = place_cache.get(key)
+    if entry is not None and entry.version == version:
+        return entry.details
 
-
-def get_place_by_id(db: Session, place_id: int) -> Optional[PlaceDetailsResponse]:
     place = db.query(Place).filter(Place.id == place_id).first()
-    return get_place_details(db, place)
+    if place is None:
+        return None
+    details = load_places_details(db, [place])[place_id]
+    place_cache.set(key, VersionedPlaceDetails(version=version, details=details))
+    return details
 
 
-def get_naver_place_info(db: Session, place_id: int) -> Optional[NaverPlaceInfoResponse]:
-    naver_place = db.query(NaverPlace).filter(NaverPlace.place_id == place_id).first()
+def to_naver_place_info(naver_place: Optional[NaverPlace]) -> Optional[NaverPlaceInfoResponse]:
     return NaverPlaceInfoResponse(
         street_address=naver_place.street_address,
         category=naver_place.subcategory,
@@ -36,8 +64,7 @@ def get_naver_place_info(db: Session, place_id: int) -> Optional[NaverPlaceInfoR
     ) if naver_place else None
 
 
-def get_kakao_place_info(db: Session, place_id: int) -> Optional[KakaoPlaceInfoResponse]:
-    kakao_place = db.query(KakaoPlace).filter(KakaoPlace.place_id == place_id).first()
+def to_kakao_place_info(kakao_place: Optional[KakaoPlace]) -> Optional[KakaoPlaceInfoResponse]:
     return KakaoPlaceInfoResponse(
         street_address=kakao_place.street_address,
         category=kakao_place.subcategory,
@@ -46,6 +73,30 @@ def get_kakao_place_info(db: Session, place_id: int) -> Optional[KakaoPlaceInfoR
     ) if kakao_place else None
 
 
+def cached(kind: str, place_id: int, load):
+    key = f"{kind}:{place_id}"
+    value = place_cache.get(key)
+    if value is None:
+        value = load()
+        if value is not None:
+            place_cache.set(key, value)
+    return value
+
+
+def get_naver_place_info(db: Session, place_id: int) -> Optional[NaverPlaceInfoResponse]:
+    def load():
+        naver_place = db.query(NaverPlace).filter(NaverPlace.place_id == place_id).first()
+        return to_naver_place_info(naver_place)
+    return cached("naver", place_id, load)
+
+
+def get_kakao_place_info(db: Session, place_id: int) -> Optional[KakaoPlaceInfoResponse]:
+    def load():
+        kakao_place = db.query(KakaoPlace).filter(KakaoPlace.place_id == place_id).first()
+        return to_kakao_place_info(kakao_place)
+    return cached("kakao", place_id, load)
+
+
 def get_place_by_name(db: Session, place_name: str) -> Optional[PlaceDetailsResponse]:
     place = db.query(Place).filter(Place.name.ilike(place_name)).first()
     return get_place_details(db, place)
@@ -60,7 +111,7 @@ def get_places_by_name(
     query = db.query(Place)
     query = query.order_by(desc(Place.name)) if order == "desc" else query.order_by(asc(Place.name))
     places = query.offset(offset).limit(limit).all()
-    return [get_place_details(db, place) for place in places]
+    return [place for place in get_places_details(db, places) if place is not None]
 
 
 def get_places(
@@ -70,286 +121,415 @@ def get_places(
     offset: int = 0, 
     limit: int = 10,
 ) -> List[PlaceDetailsResponse]:
+    rows = sort_places(db, sort_by, order).offset(offset).limit(limit).all()
+    return [place for place in get_places_details(db, [row[0] for row in rows]) if place is not None]
+
+
+def get_places_after(
+    db: Session,
+    sort_by: str,
+    order: Optional[str] = "desc",
+    cursor: Optional[str] = None,
+    limit: int = 10,
+) -> Tuple[List[PlaceDetailsResponse], Optional[str]]:
+    sort_key, tie_breaker = get_place_sort_columns(sort_by)
+    query = sort_places(db, sort_by, order)
+
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != 2:
+            raise ValueError(f"Invalid cursor: {cursor}")
+        last_key, last_id = values
+        if order == "desc":
+            query = query.filter(or_(
+                sort_key < last_key,
+                and_(sort_key == last_key, tie_breaker < last_id)
+            ))
+        else:
+            query = query.filter(or_(
+                sort_key > last_key,
+                and_(sort_key == last_key, tie_breaker > last_id)
+            ))
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][1], rows[-1][0].id])
+
+    places = [place for place in get_places_details(db, [row[0] for row in rows]) if place is not None]
+    return places, next_cursor
+
+
+def count_places(db: Session, sort_by: str = "name") -> int:
+    get_place_sort_columns(sort_by)
+    query = db.query(func.count(Place.id))
+    if sort_by != "name":
+        query = query.join(PlaceRanking, PlaceRanking.place_id == Place.id)
+    return query.scalar()
+
+
+def get_place_sort_columns(sort_by: str):
     if sort_by == "name":
-        query = db.query(Place)
-        query = query.order_by(desc(Place.name)) if order == "desc" else query.order_by(asc(Place.name))
+        return Place.name, Place.id
     elif sort_by == "review_count":
-        query = (
-            db.query(
-                Place,
-                func.greatest(
-                    func.coalesce(NaverPlace.review_count, 0),
-                    func.coalesce(KakaoPlace.review_count, 0)
-                ).label("max_review_count")
-            )
-            .join(NaverPlace, Place.id == NaverPlace.place_id, isouter=True)
-            .join(KakaoPlace, Place.id == KakaoPlace.place_id, isouter=True)
-            .group_by(Place.id)
-        )
-        query = query.order_by(desc("max_review_count") if order == "desc" else asc("max_review_count"))
+        return PlaceRanking.max_review_count, PlaceRanking.place_id
     elif sort_by == "score":
-        query = (
-            db.query(
-                Place,
-                func.greatest(
-                    func.coalesce(NaverPlace.score, 0),
-                    func.coalesce(KakaoPlace.score, 0)
-                ).label("max_score")
-            )
-            .join(NaverPlace, Place.id == NaverPlace.place_id, isouter=True)
-            .join(KakaoPlace, Place.id == KakaoPlace.place_id, isouter=True)
-            .group_by(Place.id)
-        )
-        query = query.order_by(desc("max_score") if order == "desc" else asc("max_score"))
+        return PlaceRanking.max_score, PlaceRanking.place_id
     else:
         raise ValueError(f"Invalid sort_by value: {sort_by}")
 
-    places = query.offset(offset).limit(limit).all()
-    return [get_place_details(db, place if sort_by == "name" else place[0]) for place in places]
+
+def sort_places(db: Session, sort_by: str, order: Optional[str] = "desc"):
+    sort_key, tie_breaker = get_place_sort_columns(sort_by)
+    direction = desc if order == "desc" else asc
+
+    query = db.query(Place, sort_key)
+    if sort_by != "name":
+        query = query.join(PlaceRanking, PlaceRanking.place_id == Place.id)
+    return query.order_by(direction(sort_key), direction(tie_breaker))
 
 
 def get_place_coordinate(db: Session, place_id: int) -> Optional[LatitudeLongitudeResponse]:
-    coordinate = db.query(Place.pos_x, Place.pos_y).filter(Place.id == place_id).first()
-    if coordinate:
-        latitude, longitude = coordinate.pos_x, coordinate.pos_y
-        return LatitudeLongitudeResponse(latitude=latitude, longitude=longitude)
-    return None
+    def load():
+        coordinate = db.query(Place.pos_x, Place.pos_y).filter(Place.id == place_id).first()
+        if coordinate:
+            latitude, longitude = coordinate.pos_x, coordinate.pos_y
+            return LatitudeLongitudeResponse(latitude=latitude, longitude=longitude)
+        return None
+    return cached("coordinates", place_id, load)
+
+
+def get_place_version(db: Session, place_id: int) -> Optional[Tuple]:
+    version = (
+        db.query(
+            Place.version,
+            Place.category_id,
+            select(func.count(NaverPlace.id)).where(NaverPlace.place_id == Place.id).scalar_subquery(),
+            select(func.sum(NaverPlace.version)).where(NaverPlace.place_id == Place.id).scalar_subquery(),
+            select(func.count(KakaoPlace.id)).where(KakaoPlace.place_id == Place.id).scalar_subquery(),
+            select(func.sum(KakaoPlace.version)).where(KakaoPlace.place_id == Place.id).scalar_subquery(),
+            PlaceReviewSummary.review_count,
+            PlaceReviewSummary.score_count,
+            PlaceReviewSummary.score_sum,
+            *(getattr(PlaceReviewSummary, f"score_{bucket}") for bucket in SCORE_BUCKETS)
+        )
+        .outerjoin(PlaceReviewSummary, PlaceReviewSummary.place_id == Place.id)
+        .filter(Place.id == place_id)
+        .first()
+    )
+    return tuple(version) if version else None
+
+
+def get_places_coordinates(
+    db: Session,
+    place_ids: Sequence[int]
+) -> List[Optional[LatitudeLongitudeResponse]]:
+    coordinates = {
+        int(key.split(":")[1]): value
+        for key, value in place_cache.get_many([f"coordinates:{place_id}" for place_id in set(place_ids)]).items()
+    }
+
+    missing_ids = set(place_ids) - coordinates.keys()
+    if missing_ids:
+        loaded = {
+            place_id: LatitudeLongitudeResponse(latitude=latitude, longitude=longitude)
+            for place_id, latitude, longitude in
+            db.query(Place.id, Place.pos_x, Place.pos_y).filter(Place.id.in_(missing_ids)).all()
+        }
+        place_cache.set_many({f"coordinates:{place_id}": value for place_id, value in loaded.items()})
+        coordinates.update(loaded)
+
+    return [coordinates.get(place_id) for place_id in place_ids]
 
 
 def get_place_details(db: Session, place: Place) -> Optional[PlaceDetailsResponse]:
-    if not place:
-        return None
+    return get_places_details(db, [place])[0]
+
+
+def get_places_details(
+    db: Session,
+    places: Sequence[Union[Place, int, None]]
+) -> List[Optional[PlaceDetailsResponse]]:
+    requested_ids = {
+        place.id if isinstance(place, Place) else int(place)
+        for place in places if place is not None
+    }
+    details = {
+        int(key.split(":")[1]): value
+        for key, value in place_cache.get_many([f"details:{place_id}" for place_id in requested_ids]).items()
+    }
+
+    place_ids = [
+        int(place) for place in places
+        if place is not None and not isinstance(place, Place) and int(place) not in details
+    ]
+    loaded_places = {
+        place.id: place for place in places
+        if isinstance(place, Place) and place.id not in details
+    }
+
+    missing_ids = set(place_ids) - loaded_places.keys()
+    if missing_ids:
+        loaded_places.update(
+            (place.id, place)
+            for place in db.query(Place).filter(Place.id.in_(missing_ids)).all()
+        )
+
+    if loaded_places:
+        loaded_details = load_places_details(db, list(loaded_places.values()))
+        place_cache.set_many({f"details:{place_id}": value for place_id, value in loaded_details.items()})
+        details.update(loaded_details)
+
+    return [
+        None if place is None
+        else details.get(place.id if isinstance(place, Place) else int(place))
+        for place in places
+    ]
 
-    latitude, longitude = place.pos_x, place.pos_y
-    
-    naver_info = get_naver_place_info(db, place.id)
-    kakao_info = get_kakao_place_info(db, place.id)
-
-    return PlaceDetailsResponse(
-        basic_info=BasicPlaceInfoResponse(
-            id=place.id,
-            name=place.name,
-            address=place.address,
-            street_address=place.street_address,
-            category=place.category.name,
-            LatLng=LatitudeLongitudeResponse(latitude=latitude, longitude=longitude)
-        ),
-        naver_info=naver_info if naver_info else None,
-        kakao_info=kakao_info if kakao_info else None
-    )
+
+def load_places_details(db: Session, loaded_places: List[Place]) -> Dict[int, PlaceDetailsResponse]:
+    loaded_places = {place.id: place for place in loaded_places}
+    category_ids = {place.category_id for place in loaded_places.values() if place.category_id is not None}
+    category_names = dict(
+        db.query(Category.id, Category.name).filter(Category.id.in_(category_ids)).all()
+    ) if category_ids else {}
+
+    loaded_ids = list(loaded_places)
+    naver_places, kakao_places = {}, {}
+    for naver_place in (
+        db.query(NaverPlace)
+        .filter(NaverPlace.place_id.in_(loaded_ids))
+        .order_by(NaverPlace.id)
+        .all()
+    ):
+        naver_places.setdefault(naver_place.place_id, naver_place)
+    for kakao_place in (
+        db.query(KakaoPlace)
+        .filter(KakaoPlace.place_id.in_(loaded_ids))
+        .order_by(KakaoPlace.id)
+        .all()
+    ):
+        kakao_places.setdefault(kakao_place.place_id, kakao_place)
+
+    review_summaries = {
+        summary.place_id: summary
+        for summary in db.query(PlaceReviewSummary).filter(PlaceReviewSummary.place_id.in_(loaded_ids)).all()
+    }
+
+    return {
+        place.id: PlaceDetailsResponse(
+            basic_info=BasicPlaceInfoResponse(
+                id=place.id,
+                name=place.name,
+                address=place.address,
+                street_address=place.street_address,
+                category=category_names.get(place.category_id),
+                LatLng=LatitudeLongitudeResponse(latitude=place.pos_x, longitude=place.pos_y)
+            ),
+            naver_info=to_naver_place_info(naver_places.get(place.id)),
+            kakao_info=to_kakao_place_info(kakao_places.get(place.id)),
+            review_summary=to_review_summary(place.id, review_summaries.get(place.id))
+        )
+        for place in loaded_places.values()
+    }
 
 
 def get_cluster_based_recommend(
     db: Session, 
-    model, 
-    tafp_df, 
+    cluster_table: ClusterRecommendTable, 
     user_id: int
 ) -> List[PlaceDetailsResponse]:
     user = db.query(User).filter(User.id == user_id).first()
+    if user is None:
+        return []
 
     user_info = [isWeekend(), getSeason(), 0 if user.sex == False else 1, user.age_group]
-    user_cluster = model.predict([user_info])[0]
+    place_ids = cluster_table.recommend(user_info)
 
-    recommended_places = tafp_df[model.labels_ == user_cluster]
-    place_names = recommended_places.sort_values("pop", ascending=False)["name"].unique()[:10].tolist()
-
-    return [
-        place for place_name in place_names 
-        if (place := get_place_by_name(db, place_name)) is not None
-    ]
+    return [place for place in get_places_details(db, place_ids) if place is not None]
 
 
 def get_content_based_recommend(
     db: Session, 
     category: str,
-    payload: ContentBasedRecommedRequest
+    payload: ContentBasedRecommedRequest,
+    features: PlaceFeatures
 ) -> List[PlaceDetailsResponse]:
-    visited_places_ids = db.query(VisitedPlace.place_id).filter(VisitedPlace.user_id == payload.user_id).subquery()
-
     final_subcategories = (
         db.query(NaverPlace.subcategory_id)
-        .filter(NaverPlace.place_id.in_(visited_places_ids))
+        .filter(visited_by(db, payload.user_id, NaverPlace.place_id))
         .union(
             db.query(KakaoPlace.subcategory_id)
-            .filter(KakaoPlace.place_id.in_(visited_places_ids))
+            .filter(visited_by(db, payload.user_id, KakaoPlace.place_id))
         )
         .all()
     )
 
     final_subcategories = [row[0] for row in final_subcategories]
+    subcategory_counts = Counter(final_subcategories)
 
-    all_place_ids = db.query(Place.id).all()
-
-    if len(final_subcategories) == 0:
-        final_filtered_ids = filter_by_score(db, [id[0] for id in all_place_ids], payload)[:10]
-    else:
-        final_filtered_ids = []
-        unique_subcategories = list(set(final_subcategories))
-
-        subcategory_ratio = {
-            subcategory: final_subcategories.count(subcategory) / len(final_subcategories)
-            for subcategory in unique_subcategories
-        }
+    quotas = [
+        (
+            getCategoryCode(getCategoryName(subcategory_id)),
+            round(subcategory_counts[subcategory_id] / len(final_subcategories) * payload.top_n)
+        )
+        for subcategory_id in set(final_subcategories)
+    ]
 
-        for subcategory_id, ratio in subcategory_ratio.items():
-            category_name = getCategoryName(subcategory_id)
-            category_filtered_ids = filter_by_category(db, [id[0] for id in all_place_ids], category_name)
-            filtered_distance_ids = filter_by_dist(db, category_filtered_ids, payload)
-            num_to_select = round(ratio * payload.top_n)
+    visited_place_ids = [
+        place_id for (place_id,) in
+        db.query(VisitedPlace.place_id).filter(VisitedPlace.user_id == payload.user_id).all()
+    ]
+    visited_place_ids += visit_buffer.pending(payload.user_id)
 
-            final_filtered_ids.extend(filtered_distance_ids[:num_to_select])
-    
-    if len(final_filtered_ids) == 0:
-        final_filtered_ids = filter_by_score(db, [id[0] for id in all_place_ids], payload)[:10]
+    final_filtered_ids = features.recommend(payload.latitude, payload.longitude, visited_place_ids, quotas)
 
-    return [
-        place for id in final_filtered_ids
-        if (place := get_place_by_id(db, id)) is not None
-    ]
+    return [place for place in get_places_details(db, final_filtered_ids) if place is not None]
 
 def get_collaborative_based_recommend(
     db: Session,
     model,
     category: str,
-    payload : CollaborativeBasedRecommendRequest
+    payload : CollaborativeBasedRecommendRequest,
+    scorer: Optional[EmbeddingScorer] = None,
+    universe: Optional[PlaceUniverse] = None
 ) -> List[PlaceDetailsResponse]:
+    if universe is None:
+        universe = PlaceUniverse.from_db(db)
 
-    place_size = 23443
-
-    visited_places = (
-        db.query(VisitedPlace.place_id, VisitedPlace.visit_count)
-        .filter(VisitedPlace.user_id == payload.user_id)
-        .all()
-    )
-    visited_places_dict = {place_id: visit_count for place_id, visit_count in visited_places}
-
-    all_places = np.arange(1, place_size + 1)
-    user_ids = np.full(len(all_places), payload.user_id)
-    visit_count = np.array([
-        visited_places_dict.get(place_id, 0)
-        for place_id in all_places
-    ])
-    
-    predicted_scores = model.predict([user_ids, all_places, visit_count])
-
-    place_id_list = all_places[np.argsort(predicted_scores.flatten())[::-1][:20]]
-
-    return [
-        place for id in place_id_list
-        if (place := get_place_by_id(db, id)) is not None
-    ]
-
-
-def filter_by_dist(db: Session, place_ids: List[int], payload: ContentBasedRecommedRequest) -> List[int]:
-    user_lat, user_lon = payload.latitude, payload.longitude
+    all_places, model_indices = universe.snapshot()
+    if len(all_places) == 0:
+        return []
 
-    filtered_ids = (
-        db.query(Place.id)
-        .outerjoin(NaverPlace, NaverPlace.place_id == Place.id)
-        .outerjoin(KakaoPlace, KakaoPlace.place_id == Place.id)
-        .filter(
-            Place.id.in_(place_ids),
-            ~Place.id.in_(
-                db.query(VisitedPlace.place_id).filter(VisitedPlace.user_id == payload.user_id)
+    if scorer is not None and scorer.can_score(payload.user_id, model_indices):
+        cache_key = (payload.user_id,)
+        visited_places_dict = {}
+    else:
+        scorer = None
+        visited_places = (
+            db.query(VisitedPlace.place_id, VisitedPlace.visit_count)
+            .filter(VisitedPlace.user_id == payload.user_id)
+            .all()
+        )
+        visited_places_dict = {place_id: visit_count for place_id, visit_count in visited_places}
+        for place_id, visit_count in visit_buffer.pending(payload.user_id).items():
+            visited_places_dict[place_id] = (visited_places_dict.get(place_id) or 0) + visit_count
+        cache_key = (payload.user_id, tuple(sorted(visited_places_dict.items())))
+
+    predicted_scores = universe.cached_scores(cache_key, all_places)
+    if predicted_scores is None:
+        if scorer is not None:
+            predicted_scores = scorer.scores(payload.user_id, model_indices)
+        else:
+            user_ids = np.full(len(all_places), payload.user_id)
+            visit_count = universe.visit_counts(visited_places_dict, all_places)
+            predicted_scores = model.predict([user_ids, model_indices, visit_count]).ravel()
+        universe.store_scores(cache_key, all_places, predicted_scores)
+
+    place_id_list = all_places[top_k_indices(predicted_scores, 20)]
+
+    return [place for place in get_places_details(db, place_id_list.tolist()) if place is not None]
+
+
+def visited_by(db: Session, user_id: int, place_id_column):
+    """
+    `place_id_column IN (places user_id visited)`, including visits still
+    waiting in the visit buffer.
+    """
+    visited = place_id_column.in_(db.query(VisitedPlace.place_id).filter(VisitedPlace.user_id == user_id))
+    pending = list(visit_buffer.pending(user_id))
+    return or_(visited, place_id_column.in_(pending)) if pending else visited
+
+
+def place_rankings():
+    def merged(naver_value, kakao_value):
+        return case(
+            (
+                naver_value.isnot(None) & kakao_value.isnot(None),
+                (naver_value + kakao_value) / 2.0
             ),
-            getHaversine(literal(user_lat), literal(user_lon), Place.pos_x, Place.pos_y) < 10,
-            case(
-                (
-                    NaverPlace.score.isnot(None) & KakaoPlace.score.isnot(None),
-                    (NaverPlace.score + KakaoPlace.score) / 2
-                ),
-                (NaverPlace.score.isnot(None), NaverPlace.score),
-                (KakaoPlace.score.isnot(None), KakaoPlace.score),
-                else_=None
-            ).isnot(None)
+            (naver_value.isnot(None), naver_value),
+            (kakao_value.isnot(None), kakao_value),
+            else_=None
         )
-        .order_by(
-            case(
-                (
-                    NaverPlace.score.isnot(None) & KakaoPlace.score.isnot(None),
-                    (NaverPlace.score + KakaoPlace.score) / 2
-                ),
-                (NaverPlace.score.isnot(None), NaverPlace.score),
-                (KakaoPlace.score.isnot(None), KakaoPlace.score),
-                else_=None
-            ).desc(),
-            case(
-                (
-                    NaverPlace.review_count.isnot(None) & KakaoPlace.review_count.isnot(None),
-                    (NaverPlace.review_count + KakaoPlace.review_count) / 2
-                ),
-                (NaverPlace.review_count.isnot(None), NaverPlace.review_count),
-                (KakaoPlace.review_count.isnot(None), KakaoPlace.review_count),
-                else_=None
-            ).desc()
+
+    def greatest(naver_value, kakao_value):
+        naver_value, kakao_value = func.coalesce(naver_value, 0), func.coalesce(kakao_value, 0)
+        return case((naver_value >= kakao_value, naver_value), else_=kakao_value)
+
+    return (
+        select(
+            Place.id.label("place_id"),
+            func.max(merged(NaverPlace.score, KakaoPlace.score)).label("score"),
+            func.max(merged(NaverPlace.review_count, KakaoPlace.review_count)).label("review_count"),
+            func.coalesce(func.max(greatest(NaverPlace.score, KakaoPlace.score)), 0).label("max_score"),
+            func.coalesce(
+                func.max(greatest(NaverPlace.review_count, KakaoPlace.review_count)), 0
+            ).label("max_review_count"),
         )
-        .all()
+        .outerjoin(NaverPlace, NaverPlace.place_id == Place.id)
+        .outerjoin(KakaoPlace, KakaoPlace.place_id == Place.id)
+        .group_by(Place.id)
     )
 
-    return [id[0] for id in filtered_ids]
 
-def filter_by_score(db: Session, place_ids: List[int], payload: ContentBasedRecommedRequest) -> List[int]:
+def refresh_place_ranking(db: Session, place_ids: Optional[List[int]] = None) -> None:
+    rankings = place_rankings()
+    stale_rankings = db.query(PlaceRanking)
+    if place_ids is not None:
+        rankings = rankings.where(Place.id.in_(place_ids))
+        stale_rankings = stale_rankings.filter(PlaceRanking.place_id.in_(place_ids))
 
-    filtered_ids = (
-        db.query(Place.id)
-        .outerjoin(NaverPlace, NaverPlace.place_id == Place.id)
-        .outerjoin(KakaoPlace, KakaoPlace.place_id == Place.id)
-        .filter(
-            Place.id.in_(place_ids),
-            ~Place.id.in_(
-                db.query(VisitedPlace.place_id).filter(VisitedPlace.user_id == payload.user_id)
-            ),
-            case(
-                (
-                    NaverPlace.score.isnot(None) & KakaoPlace.score.isnot(None),
-                    (NaverPlace.score + KakaoPlace.score) / 2
-                ),
-                (NaverPlace.score.isnot(None), NaverPlace.score),
-                (KakaoPlace.score.isnot(None), KakaoPlace.score),
-                else_=None
-            ).isnot(None)
-        )
-        .order_by(
-            case(
-                (
-                    NaverPlace.score.isnot(None) & KakaoPlace.score.isnot(None),
-                    (NaverPlace.score + KakaoPlace.score) / 2
-                ),
-                (NaverPlace.score.isnot(None), NaverPlace.score),
-                (KakaoPlace.score.isnot(None), KakaoPlace.score),
-                else_=None
-            ).desc(),
-            case(
-                (
-                    NaverPlace.review_count.isnot(None) & KakaoPlace.review_count.isnot(None),
-                    (NaverPlace.review_count + KakaoPlace.review_count) / 2
-                ),
-                (NaverPlace.review_count.isnot(None), NaverPlace.review_count),
-                (KakaoPlace.review_count.isnot(None), KakaoPlace.review_count),
-                else_=None
-            ).desc()
+    stale_rankings.delete(synchronize_session=False)
+    db.execute(
+        insert(PlaceRanking).from_select(
+            ["place_id", "score", "review_count", "max_score", "max_review_count"],
+            rankings
         )
-        .all()
     )
+    db.commit()
+    invalidate_places(place_ids)
 
-    return [id[0] for id in filtered_ids]
 
-def filter_by_category(db: Session, place_ids: List[int], category: str) -> List[int]:
-    subcategory_ids = getCategoryCode(category)
-    if not subcategory_ids:
-        return []
+def differs(stored, current, tolerance: float = 1e-3):
+    # place_ranking columns are single precision FLOATs on MySQL, so stored
+    # averages never compare exactly equal to freshly computed ones.
+    return or_(
+        and_(stored.is_(None), current.isnot(None)),
+        and_(stored.isnot(None), current.is_(None)),
+        func.abs(stored - current) > tolerance,
+    )
 
-    filtered_ids = (
-        db.query(Place.id)
-        .outerjoin(NaverPlace, NaverPlace.place_id == Place.id)
-        .outerjoin(KakaoPlace, KakaoPlace.place_id == Place.id)
-        .filter(
-            Place.id.in_(place_ids),
-            or_(
-                NaverPlace.subcategory_id.in_(subcategory_ids),
-                KakaoPlace.subcategory_id.in_(subcategory_ids),
+
+def sync_place_ranking(db: Session) -> int:
+    """
+    Re-ranks the places whose place_ranking row is missing or no longer matches
+    their Naver/Kakao scores and review counts, e.g. after the loader wrote new
+    ones. Returns how many places were re-ranked.
+    """
+    if db.query(PlaceRanking.place_id).first() is None:
+        refresh_place_ranking(db)
+        return db.query(func.count(PlaceRanking.place_id)).scalar()
+
+    rankings = place_rankings().subquery()
+    place_ids = [
+        place_id for (place_id,) in
+        db.query(rankings.c.place_id)
+        .outerjoin(PlaceRanking, PlaceRanking.place_id == rankings.c.place_id)
+        .filter(or_(
+            PlaceRanking.place_id.is_(None),
+            *(
+                differs(getattr(PlaceRanking, column), rankings.c[column])
+                for column in ("score", "review_count", "max_score", "max_review_count")
             )
-        )
+        ))
         .all()
-    )
-    return [id[0] for id in filtered_ids]
+    ]
+    if place_ids:
+        try:
+            refresh_place_ranking(db, place_ids)
+        except IntegrityError:
+            # Another instance re-ranked them at the same time.
+            db.rollback()
+    return len(place_ids)
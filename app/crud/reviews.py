@@ -1,20 +1,177 @@
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
+from sqlalchemy import case, func, insert, select
 from sqlalchemy.orm import Session
 
 from app.schemas.reviews import (
     ReviewResponse, 
-    ReviewsCreateRequest
+    ReviewsCreateRequest,
+    ReviewSummaryResponse
 )
-from app.models.reviews import Review
+from app.models.reviews import Review, PlaceReviewSummary
 from app.models.places import Place
+from app.utils.cache import invalidate_places
+from app.utils.pagination import decode_cursor, encode_cursor
 
+SCORE_BUCKETS = range(1, 6)
 
-def get_review_by_id(db: Session, place_id: int) -> Optional[ReviewResponse]:
-    return db.query(Review).filter(Review.place_id == place_id).all()
+
+def get_review_by_id(
+    db: Session,
+    place_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 50
+) -> Tuple[List[ReviewResponse], Optional[str]]:
+    query = db.query(Review).filter(Review.place_id == place_id)
+
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != 1:
+            raise ValueError(f"Invalid cursor: {cursor}")
+        query = query.filter(Review.id < values[0])
+
+    reviews = query.order_by(Review.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(reviews) > limit:
+        reviews = reviews[:limit]
+        next_cursor = encode_cursor([reviews[-1].id])
+
+    return [ReviewResponse.model_validate(review) for review in reviews], next_cursor
+
+
+def get_review_version(db: Session, place_id: int) -> Tuple:
+    return tuple(
+        db.query(func.count(Review.id), func.max(Review.id), func.sum(Review.version))
+        .filter(Review.place_id == place_id)
+        .one()
+    )
+
+
+def score_bucket(score: float) -> int:
+    for bucket in SCORE_BUCKETS[:-1]:
+        if score < bucket + 0.5:
+            return bucket
+    return SCORE_BUCKETS[-1]
+
+
+def to_review_summary(place_id: int, summary: Optional[PlaceReviewSummary]) -> ReviewSummaryResponse:
+    if summary is None:
+        return ReviewSummaryResponse(
+            place_id=place_id,
+            review_count=0,
+            average_score=None,
+            histogram={bucket: 0 for bucket in SCORE_BUCKETS}
+        )
+
+    return ReviewSummaryResponse(
+        place_id=place_id,
+        review_count=summary.review_count,
+        average_score=summary.score_sum / summary.score_count if summary.score_count else None,
+        histogram={bucket: getattr(summary, f"score_{bucket}") for bucket in SCORE_BUCKETS}
+    )
+
+
+def get_review_summary(db: Session, place_id: int) -> Optional[ReviewSummaryResponse]:
+    if db.query(Place.id).filter(Place.id == place_id).first() is None:
+        return None
+    summary = db.query(PlaceReviewSummary).filter(PlaceReviewSummary.place_id == place_id).first()
+    return to_review_summary(place_id, summary)
+
+
+def empty_summary() -> Dict[str, float]:
+    return {
+        "review_count": 0,
+        "score_count": 0,
+        "score_sum": 0,
+        **{f"score_{bucket}": 0 for bucket in SCORE_BUCKETS}
+    }
+
+
+def update_review_summary(db: Session, place_id: int, score: Optional[float], sign: int) -> None:
+    """
+    Adds (sign = 1) or removes (sign = -1) one review in the place's summary row.
+    The first review of a place inserts the row in the same statement, so two
+    concurrent first reviews cannot both try to insert it.
+    """
+    changes: Dict[str, float] = {"review_count": sign}
+    if score is not None:
+        changes["score_count"] = sign
+        changes["score_sum"] = sign * score
+        changes[f"score_{score_bucket(score)}"] = sign
+
+    row = {"place_id": place_id, **empty_summary(), **changes}
+    table = PlaceReviewSummary.__table__
+    dialect = db.get_bind().dialect.name
+    if sign < 0 or dialect not in ("mysql", "sqlite", "postgresql"):
+        updated = (
+            db.query(PlaceReviewSummary)
+            .filter(PlaceReviewSummary.place_id == place_id)
+            .update(
+                {table.c[name]: table.c[name] + change for name, change in changes.items()},
+                synchronize_session=False
+            )
+        )
+        if not updated and sign > 0:
+            db.add(PlaceReviewSummary(**row))
+        return
+
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as upsert
+
+        statement = upsert(table).values(row)
+        statement = statement.on_duplicate_key_update(
+            {name: table.c[name] + statement.inserted[name] for name in changes}
+        )
+    else:
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as upsert
+
+        statement = upsert(table).values(row)
+        statement = statement.on_conflict_do_update(
+            index_elements=["place_id"],
+            set_={name: table.c[name] + statement.excluded[name] for name in changes}
+        )
+    db.execute(statement)
+
+
+def refresh_review_summaries(db: Session) -> None:
+    bucket_of_score = case(
+        *((Review.score < bucket + 0.5, bucket) for bucket in SCORE_BUCKETS[:-1]),
+        else_=SCORE_BUCKETS[-1]
+    )
+    summaries = select(
+        Review.place_id,
+        func.count(Review.id),
+        func.count(Review.score),
+        func.coalesce(func.sum(Review.score), 0),
+        *(
+            func.sum(case(
+                (Review.score.is_(None), 0),
+                (bucket_of_score == bucket, 1),
+                else_=0
+            ))
+            for bucket in SCORE_BUCKETS
+        )
+    ).group_by(Review.place_id)
+
+    db.query(PlaceReviewSummary).delete(synchronize_session=False)
+    db.execute(
+        insert(PlaceReviewSummary).from_select(
+            ["place_id", "review_count", "score_count", "score_sum"]
+            + [f"score_{bucket}" for bucket in SCORE_BUCKETS],
+            summaries
+        )
+    )
+    db.commit()
+    invalidate_places()
 
 
 def create_review(db: Session, review: ReviewsCreateRequest) -> Optional[ReviewResponse]:
+    if db.query(Place.id).filter(Place.id == review.place_id).first() is None:
+        return None
+
     new_review = Review(
         place_id=review.place_id,
         user_id=review.user_id,
@@ -22,11 +179,10 @@ def create_review(db: Session, review: ReviewsCreateRequest) -> Optional[ReviewR
         score=review.score,
     )
 
-    place = db.query(Place).filter(Place.id == review.place_id).first()
-    place.reviews += 1
-
     db.add(new_review)
+    update_review_summary(db, review.place_id, review.score, 1)
     db.commit()
+    invalidate_places([review.place_id])
     db.refresh(new_review)
 
     return ReviewResponse.model_validate(new_review)
@@ -36,7 +192,9 @@ def delete_review(db: Session, review_id: int) -> bool:
     review = db.query(Review).filter(Review.id == review_id).first()
     
     if review:
+        update_review_summary(db, review.place_id, review.score, -1)
         db.delete(review)
         db.commit()
+        invalidate_places([review.place_id])
         return True
     return False
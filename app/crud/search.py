@@ -1,24 +1,52 @@
-from typing import List
+from collections import defaultdict
+from typing import List, Optional, Tuple
 
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import or_, func
 
 from app.schemas.search import SearchResponse
 from app.models.places import Place
 from app.models.menus import Menu
+from app.utils.search_index import SearchIndex
 
 
-def search_keyword(db: Session, keyword: str) -> List[SearchResponse]:
-    results = db.query(Place.id, Place.name, Menu.menu) \
-        .outerjoin(Menu, Place.id == Menu.place_id) \
-        .filter(or_(
-            Place.name.like(f'%{keyword}%'),
-            Menu.menu.like(f'%{keyword}%')
-        )) \
-        .all()
+def search_keyword(
+    db: Session,
+    keyword: str,
+    offset: int = 0,
+    limit: int = 50,
+    index: Optional[SearchIndex] = None
+) -> Tuple[List[SearchResponse], int]:
+    if index is not None:
+        results = index.search(keyword)
+        return [SearchResponse(
+            place_id=place_id,
+            place_name=place_name,
+            menus=menus
+        ) for place_id, place_name, menus in results[offset:offset + limit]], len(results)
+
+    pattern = f'%{keyword}%'
+    matches = db.query(Place.id, Place.name).filter(or_(
+        Place.name.like(pattern),
+        db.query(Menu.id)
+        .filter(Menu.place_id == Place.id, Menu.menu.like(pattern))
+        .exists()
+    ))
+
+    total = matches.with_entities(func.count(Place.id)).scalar()
+    places = matches.order_by(Place.id).offset(offset).limit(limit).all()
+    if not places:
+        return [], total
+
+    menus = defaultdict(list)
+    for place_id, menu in db.query(Menu.place_id, Menu.menu) \
+            .filter(Menu.place_id.in_([place.id for place in places]), Menu.menu.like(pattern)) \
+            .order_by(Menu.id) \
+            .all():
+        menus[place_id].append(menu)
 
     return [SearchResponse(
-        place_id=result[0],
-        place_name=result[1],
-        menu_name=result[2]
-    ) for result in results]
+        place_id=place.id,
+        place_name=place.name,
+        menus=menus.get(place.id, [])
+    ) for place in places], total
@@ -1,33 +1,179 @@
-from typing import Optional
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
 
+from sqlalchemy import func, tuple_
 from sqlalchemy.orm import Session
 
+from app.models.places import Place
+from app.models.users import User
 from app.models.visitedplaces import VisitedPlace
-from app.schemas.visitedplaces import VisitedPlaceCreateRequest, VisitedPlaceResponse
+from app.schemas.visitedplaces import (
+    VisitedPlaceCreateRequest,
+    VisitedPlaceResponse,
+    VisitBatchRequest,
+    VisitBatchResponse
+)
 from app.schemas.places import PlaceDetailsResponse
-from app.crud.places import get_place_details
+from app.crud.places import get_places_details
+from app.utils.visit_buffer import visit_buffer
 
-def add_visited_place(db: Session, place: VisitedPlaceCreateRequest) -> VisitedPlaceResponse:
-    visited_place = db.query(VisitedPlace).filter_by(
-        user_id=place.user_id, 
-        place_id=place.place_id
-    ).first()
 
-    if visited_place:
-        visited_place.visit_count += 1
+def upsert_visits(db: Session, visits: Dict[Tuple[int, int], int]) -> None:
+    """
+    Adds `count` to the visit_count of every (user_id, place_id) in one statement,
+    inserting the rows that do not exist yet. Relies on the unique
+    (user_id, place_id) index. Dialects without an upsert statement fall back to
+    a SELECT followed by an UPDATE or INSERT per pair.
+    """
+    if not visits:
+        return
+
+    rows = [
+        {"user_id": user_id, "place_id": place_id, "visit_count": count}
+        for (user_id, place_id), count in sorted(visits.items())
+    ]
+    visit_count = func.coalesce(VisitedPlace.__table__.c.visit_count, 0)
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+
+        statement = insert(VisitedPlace).values(rows)
+        statement = statement.on_duplicate_key_update(visit_count=visit_count + statement.inserted.visit_count)
+    elif dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+
+        statement = insert(VisitedPlace).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_id", "place_id"],
+            set_={"visit_count": visit_count + statement.excluded.visit_count}
+        )
     else:
-        visited_place = VisitedPlace(
-            place_id=place.place_id,
-            user_id=place.user_id,
-            visit_count=1
+        # No upsert statement on this dialect: increment the rows that exist and
+        # insert the others. A concurrent insert of the same pair fails on the
+        # unique index instead of creating a duplicate.
+        pairs = [(row["user_id"], row["place_id"]) for row in rows]
+        existing = set(
+            db.query(VisitedPlace.user_id, VisitedPlace.place_id)
+            .filter(tuple_(VisitedPlace.user_id, VisitedPlace.place_id).in_(pairs))
+            .all()
+        )
+        for row in rows:
+            if (row["user_id"], row["place_id"]) in existing:
+                db.query(VisitedPlace).filter(
+                    VisitedPlace.user_id == row["user_id"],
+                    VisitedPlace.place_id == row["place_id"]
+                ).update({VisitedPlace.visit_count: visit_count + row["visit_count"]}, synchronize_session=False)
+            else:
+                db.add(VisitedPlace(**row))
+        db.flush()
+        return
+
+    db.execute(statement)
+
+
+def get_visits(db: Session, pairs: List[Tuple[int, int]]) -> List[VisitedPlace]:
+    if not pairs:
+        return []
+    return (
+        db.query(VisitedPlace)
+        .filter(tuple_(VisitedPlace.user_id, VisitedPlace.place_id).in_(pairs))
+        .order_by(VisitedPlace.user_id, VisitedPlace.place_id)
+        .all()
+    )
+
+
+def known_ids(db: Session, user_ids, place_ids) -> Tuple[set, set]:
+    known_users = {user_id for (user_id,) in db.query(User.id).filter(User.id.in_(user_ids)).all()}
+    known_places = {place_id for (place_id,) in db.query(Place.id).filter(Place.id.in_(place_ids)).all()}
+    return known_users, known_places
+
+
+def with_pending(db: Session, pairs: List[Tuple[int, int]]) -> List[VisitedPlaceResponse]:
+    """
+    Stored plus buffered, not yet committed visit counts of `pairs`, in order.
+    The buffer is read before the table, so a flush committing in between is
+    counted twice rather than not at all; counts are approximate while a flush
+    is running.
+    """
+    pending = {user_id: visit_buffer.pending(user_id) for user_id in {user_id for user_id, _ in pairs}}
+    stored = {(visit.user_id, visit.place_id): visit.visit_count or 0 for visit in get_visits(db, pairs)}
+    return [
+        VisitedPlaceResponse(
+            user_id=user_id,
+            place_id=place_id,
+            visit_count=stored.get((user_id, place_id), 0) + pending[user_id].get(place_id, 0)
         )
-        db.add(visited_place)
-    
+        for user_id, place_id in sorted(pairs)
+    ]
+
+
+def add_visited_place(db: Session, place: VisitedPlaceCreateRequest) -> Optional[VisitedPlaceResponse]:
+    known_users, known_places = known_ids(db, {place.user_id}, {place.place_id})
+    if place.user_id not in known_users or place.place_id not in known_places:
+        return None
+
+    pair = (place.user_id, place.place_id)
+    if visit_buffer.running:
+        visit_buffer.add(place.user_id, place.place_id)
+    else:
+        upsert_visits(db, {pair: 1})
+        db.commit()
+    (visit,) = with_pending(db, [pair])
+    return visit
+
+
+def add_visited_places(db: Session, batch: VisitBatchRequest) -> VisitBatchResponse:
+    known_users, known_places = known_ids(
+        db, {event.user_id for event in batch.events}, {event.place_id for event in batch.events}
+    )
+
+    visits: Dict[Tuple[int, int], int] = defaultdict(int)
+    rejected = []
+    for event in batch.events:
+        if event.user_id in known_users and event.place_id in known_places:
+            visits[(event.user_id, event.place_id)] += event.count
+        else:
+            rejected.append(event)
+
+    if visit_buffer.running:
+        for (user_id, place_id), count in visits.items():
+            visit_buffer.add(user_id, place_id, count)
+        stored = with_pending(db, list(visits))
+    else:
+        upsert_visits(db, visits)
+        db.commit()
+        stored = [
+            VisitedPlaceResponse(user_id=visit.user_id, place_id=visit.place_id, visit_count=visit.visit_count)
+            for visit in get_visits(db, list(visits))
+        ]
+
+    return VisitBatchResponse(accepted=len(batch.events) - len(rejected), rejected=rejected, visits=stored)
+
+
+def flush_visits(db: Session, visits: Dict[Tuple[int, int], int]) -> int:
+    """
+    Writes a batch from the visit buffer. Pairs whose user or place no longer
+    exists are skipped; returns how many were.
+    """
+    known_users, known_places = known_ids(
+        db, {user_id for user_id, _ in visits}, {place_id for _, place_id in visits}
+    )
+    known = {
+        (user_id, place_id): count for (user_id, place_id), count in visits.items()
+        if user_id in known_users and place_id in known_places
+    }
+    upsert_visits(db, known)
     db.commit()
-    db.refresh(visited_place)
-    return visited_place
+    return len(visits) - len(known)
 
 
 def get_visited_place_by_user(db: Session, user_id: int) -> Optional[PlaceDetailsResponse]:
     visited_places = db.query(VisitedPlace).filter_by(user_id=user_id).all()
-    return [get_place_details(db, visited_place.place) for visited_place in visited_places]
+    place_ids = [visited_place.place_id for visited_place in visited_places]
+    stored = set(place_ids)
+    place_ids += [place_id for place_id in visit_buffer.pending(user_id) if place_id not in stored]
+    return [place for place in get_places_details(db, place_ids) if place is not None]
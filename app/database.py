@@ -6,11 +6,21 @@ from sqlalchemy.orm import sessionmaker
 
 from dotenv import load_dotenv
 
+from app.utils.metrics import TimedQueuePool, metrics
+
 load_dotenv()
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 AWS_RDS_URL = os.getenv("AWS_RDS_URL")
 
+# Route handlers that use get_db are plain `def` functions, so FastAPI runs them
+# (and get_db itself) on the worker threadpool instead of the event loop.
+# The threadpool is sized to the connection pool so threads never queue on it.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_THREADPOOL_SIZE = DB_POOL_SIZE + DB_MAX_OVERFLOW
+SQL_ECHO = os.getenv("SQL_ECHO", "0") == "1"
+
 def get_db():
     db = SessionLocal()
     try:
@@ -22,7 +32,15 @@ def get_db():
     finally:
         db.close()
 
-engine = create_engine(AWS_RDS_URL, echo=True)
+engine = create_engine(
+    AWS_RDS_URL,
+    echo=SQL_ECHO,
+    poolclass=TimedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW
+)
+metrics.instrument(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
+
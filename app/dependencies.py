@@ -1,6 +1,7 @@
 from datetime import datetime
 
 import pyproj
+from fastapi import HTTPException, Request
 from sqlalchemy.sql import func
 
 grs80 = pyproj.Proj(init="epsg:5174")
@@ -10,6 +11,21 @@ def toLatLng(x, y):
     return pyproj.transform(grs80, wgs84, x, y)
 
 
+def requireReady(request: Request):
+    registry = getattr(request.app.state, "registry", None)
+    bundle = registry.active if registry is not None else None
+    if bundle is None:
+        raise HTTPException(status_code=503, detail="models are still loading")
+    return bundle
+
+
+def requirePlaceFeatures(request: Request):
+    features = getattr(request.app.state, "place_features", None)
+    if features is None:
+        raise HTTPException(status_code=503, detail="place features are still loading")
+    return features
+
+
 def getSeason():
     month = datetime.now().month
     if month in [3, 4, 5]:
@@ -1,45 +1,196 @@
 import os
+import time
+import logging
+import threading
 import joblib
 import pandas as pd
+from anyio import to_thread
+from concurrent.futures import ThreadPoolExecutor
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 
-from app.routers import places, users, visitedplaces, menus, reviews, search
+from app.database import SessionLocal, engine, DB_THREADPOOL_SIZE
+from app.crud.places import sync_place_ranking
+from app.crud.reviews import refresh_review_summaries
+from app.crud.visitedplaces import flush_visits
+from app.migrations import pending_migrations
+from app.models.reviews import PlaceReviewSummary
+from app.routers import places, users, visitedplaces, menus, reviews, search, models
+from app.utils.artifacts import Artifact, load_artifacts, load_keras_model
+from app.utils.autocomplete import AutocompleteIndex
+from app.utils.cache import place_cache
+from app.utils.cluster import ClusterRecommendTable, resolve_place_ids
+from app.utils.content import PlaceFeatures
+from app.utils.collaborative import EmbeddingScorer, PlaceUniverse, place_vocabulary_size
+from app.utils.inference import BatchingPredictor
+from app.utils.metrics import metrics, render_stats, start_request
+from app.utils.registry import ModelBundle, ModelRegistry
+from app.utils.search_index import SearchIndex
+from app.utils.visit_buffer import VISIT_WRITE_BEHIND, visit_buffer
 
-from huggingface_hub import hf_hub_download
-from tensorflow.keras.models import load_model
-from tensorflow.keras.losses import MeanSquaredError
+logger = logging.getLogger(__name__)
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    HUGGING_FACE_TOKEN = os.getenv("HUGGING_FACE_TOKEN")
+MODEL_VERSION = os.getenv("MODEL_VERSION", "main")
+INDEX_REFRESH_INTERVAL = float(os.getenv("INDEX_REFRESH_INTERVAL_S", 600))
+
+ARTIFACTS = [
+    Artifact("c_model", "GomDue/kmodes_model", "kmodes_model.joblib", joblib.load),
+    Artifact("cf_model", "GomDue/collaborative_filtering_model", "collaborative_filtering_model.h5", load_keras_model),
+    Artifact("tafp_df", "GomDue/kmodes_model", "tafp_dataset.csv", pd.read_csv),
+]
+
+
+def timed(timings: dict, name: str, step):
+    started = time.perf_counter()
+    result = step()
+    timings[name] = {"load_ms": round((time.perf_counter() - started) * 1000, 1)}
+    return result
+
+
+def build_indexes(app: FastAPI, timings: dict) -> None:
+    with SessionLocal() as db:
+        timed(timings, "place_ranking", lambda: sync_place_ranking(db))
+        if db.query(PlaceReviewSummary.place_id).first() is None:
+            timed(timings, "review_summaries", lambda: refresh_review_summaries(db))
+        app.state.place_features = timed(timings, "place_features", lambda: PlaceFeatures.from_db(db))
+        app.state.search_index = timed(timings, "search_index", lambda: SearchIndex.from_db(db))
+        app.state.autocomplete_index = timed(timings, "autocomplete_index", lambda: AutocompleteIndex.from_db(db))
+
+
+def refresh_indexes(app: FastAPI, timings: dict) -> None:
+    """
+    Picks up places, scores and menus written since startup by whatever loads
+    them into the database: re-ranks new and rescored places and rebuilds the
+    in-process indexes and the active model bundle's place universe.
+    """
+    registry = getattr(app.state, "registry", None)
+    bundle = registry.active if registry is not None else None
+    with SessionLocal() as db:
+        timed(timings, "place_ranking", lambda: sync_place_ranking(db))
+        timed(timings, "place_features", lambda: app.state.place_features.refresh(db))
+        timed(timings, "search_index", lambda: app.state.search_index.refresh(db))
+        app.state.autocomplete_index = timed(timings, "autocomplete_index", lambda: AutocompleteIndex.from_db(db))
+        if bundle is not None:
+            timed(timings, "cf_universe", lambda: bundle.cf_universe.refresh(db))
+
+
+def refresh_indexes_periodically(app: FastAPI, stopping: threading.Event) -> None:
+    while not stopping.wait(INDEX_REFRESH_INTERVAL):
+        if not app.state.ready:
+            continue
+        timings = {}
+        try:
+            refresh_indexes(app, timings)
+        except Exception:
+            logger.exception("Refreshing the place indexes failed")
+            continue
+        logger.info("Refreshed place indexes: %s", timings)
 
-    model_path = hf_hub_download(
-        repo_id="GomDue/kmodes_model", 
-        filename="kmodes_model.joblib",
-        token=HUGGING_FACE_TOKEN
+
+def build_bundle(version: str) -> ModelBundle:
+    timings = {}
+    artifacts, artifact_timings = load_artifacts(
+        ARTIFACTS, os.getenv("HUGGING_FACE_TOKEN"), revision=version
+    )
+    timings.update(artifact_timings)
+
+    cf_model = artifacts["cf_model"]
+    cf_predictor = BatchingPredictor(
+        cf_model,
+        max_batch_size=int(os.getenv("CF_MAX_BATCH_SIZE", 8)),
+        max_wait=float(os.getenv("CF_MAX_WAIT_MS", 5)) / 1000,
+        max_queue_size=int(os.getenv("CF_MAX_QUEUE_SIZE", 64)),
+        timeout=float(os.getenv("CF_PREDICT_TIMEOUT_MS", 30000)) / 1000,
     )
-    app.state.c_model = joblib.load(model_path)
 
-    model_path = hf_hub_download(
-        repo_id="GomDue/collaborative_filtering_model", 
-        filename="collaborative_filtering_model.h5",
-        token=HUGGING_FACE_TOKEN
+    scorer = EmbeddingScorer.from_model(cf_model)
+    vocabulary_size = place_vocabulary_size(cf_model)
+    if vocabulary_size is None:
+        logger.warning("Could not read the place vocabulary size of the CF model")
+    with SessionLocal() as db:
+        cf_universe = timed(timings, "cf_universe", lambda: PlaceUniverse.from_db(db, vocabulary_size))
+        tafp_df = timed(timings, "tafp_place_ids", lambda: resolve_place_ids(db, artifacts["tafp_df"]))
+
+    cf_scorer = None
+    if os.getenv("CF_FAST_SCORING", "1") == "1" and scorer is not None:
+        if timed(timings, "cf_scorer", lambda: scorer.validate(cf_model, cf_universe.model_indices)):
+            cf_scorer = scorer
+
+    cluster_table = timed(
+        timings, "cluster_table", lambda: ClusterRecommendTable(artifacts["c_model"], tafp_df)
     )
-    os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
-    app.state.cf_model = load_model(model_path, custom_objects={"mse": MeanSquaredError()})
 
-    file_path = hf_hub_download(
-        repo_id="GomDue/kmodes_model",
-        filename="tafp_dataset.csv",
-        token=HUGGING_FACE_TOKEN
+    return ModelBundle(
+        version=version,
+        c_model=artifacts["c_model"],
+        cf_model=cf_model,
+        tafp_df=tafp_df,
+        cluster_table=cluster_table,
+        cf_predictor=cf_predictor,
+        cf_scorer=cf_scorer,
+        cf_universe=cf_universe,
+        timings=timings,
     )
-    app.state.tafp_df = pd.read_csv(file_path)
+
+
+def write_buffered_visits(visits: dict) -> int:
+    with SessionLocal() as db:
+        dropped = flush_visits(db, visits)
+    if dropped:
+        logger.warning("Dropped %d buffered visit pairs of unknown users or places", dropped)
+    return dropped
+
+
+def start(app: FastAPI) -> None:
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="startup") as executor:
+            indexes = executor.submit(build_indexes, app, app.state.startup_timings)
+            models = executor.submit(app.state.registry.load, MODEL_VERSION)
+            indexes.result()
+            models.result()
+    except Exception as e:
+        logger.exception("Startup failed")
+        app.state.startup_error = repr(e)
+        return
+
+    app.state.startup_timings["models"] = app.state.registry.active.timings
+    app.state.startup_timings["total"] = {"load_ms": round((time.perf_counter() - started) * 1000, 1)}
+    logger.info("Startup finished: %s", app.state.startup_timings)
+    app.state.ready = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    to_thread.current_default_thread_limiter().total_tokens = DB_THREADPOOL_SIZE
+
+    pending = pending_migrations(engine)
+    if pending:
+        logger.warning("Pending schema migrations, run `python -m app.migrations`: %s", ", ".join(pending))
+
+    app.state.ready = False
+    app.state.startup_error = None
+    app.state.startup_timings = {}
+    app.state.registry = ModelRegistry(build_bundle)
+    threading.Thread(target=start, args=(app,), name="startup", daemon=True).start()
+    if VISIT_WRITE_BEHIND:
+        visit_buffer.start(write_buffered_visits)
+    stopping = threading.Event()
+    if INDEX_REFRESH_INTERVAL > 0:
+        threading.Thread(
+            target=refresh_indexes_periodically, args=(app, stopping), name="index-refresh", daemon=True
+        ).start()
 
     yield
 
+    stopping.set()
+    visit_buffer.close()
+    if app.state.registry.active is not None:
+        app.state.registry.active.close()
+
 
 app = FastAPI(lifespan=lifespan)
 
@@ -53,13 +204,69 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def instrument_request(request: Request, call_next):
+    stats = start_request()
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+
+    route = request.scope.get("route")
+    metrics.observe_request(
+        request.method, route.path if route else "unmatched", response.status_code, elapsed, stats
+    )
+    response.headers["X-DB-Query-Count"] = str(stats.queries)
+    response.headers["X-DB-Time-Ms"] = f"{stats.db_seconds * 1000:.1f}"
+    response.headers["X-DB-Pool-Wait-Ms"] = f"{stats.pool_wait_seconds * 1000:.1f}"
+    return response
+
+
 app.include_router(places.router)
 app.include_router(users.router)
 app.include_router(visitedplaces.router)
 app.include_router(menus.router)
 app.include_router(reviews.router)
 app.include_router(search.router)
+app.include_router(models.router)
 
 @app.get("/")
 async def healthcheck():
     return {"Health Check": "OK"}
+
+
+@app.get("/ready")
+async def readiness():
+    content = {
+        "ready": app.state.ready,
+        "error": app.state.startup_error,
+        "timings": app.state.startup_timings,
+    }
+    return JSONResponse(content, status_code=200 if app.state.ready else 503)
+
+
+@app.get("/metrics/inference")
+async def inference_metrics():
+    bundle = app.state.registry.active
+    if bundle is None:
+        return JSONResponse({"detail": "models are not loaded"}, status_code=503)
+    stats = bundle.cf_predictor.stats()
+    stats["version"] = bundle.version
+    stats["fast_scoring"] = bundle.cf_scorer.validation if bundle.cf_scorer else None
+    return stats
+
+
+@app.get("/metrics/cache")
+async def cache_metrics():
+    return place_cache.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    extra = render_stats("place_cache", place_cache.stats())
+    bundle = app.state.registry.active
+    if bundle is not None:
+        extra += render_stats("inference", bundle.cf_predictor.stats(), {"version": bundle.version})
+    extra += visit_buffer.render()
+    extra.append(f"app_ready {int(app.state.ready)}")
+    return PlainTextResponse(metrics.render(extra), media_type="text/plain; version=0.0.4")
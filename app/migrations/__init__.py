@@ -0,0 +1,74 @@
+"""
+Versioned schema migrations, run once per deploy before the new app version
+starts:
+
+    python -m app.migrations            # apply pending migrations
+    python -m app.migrations --status   # list applied and pending migrations
+
+Applied migration names are recorded in `schema_migration`. The app itself
+never changes the schema; it only logs a warning at startup when migrations
+are pending.
+"""
+import importlib
+import logging
+from contextlib import contextmanager
+from typing import List
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = [
+    "m0001_create_tables",
+    "m0002_add_missing_columns",
+    "m0003_unique_visits",
+]
+
+schema_migration = Table(
+    "schema_migration",
+    MetaData(),
+    Column("name", String(255), primary_key=True),
+    Column("applied_at", DateTime, nullable=False, server_default=func.now()),
+)
+
+
+def applied_migrations(bind: Engine) -> List[str]:
+    if not inspect(bind).has_table(schema_migration.name):
+        return []
+    with bind.connect() as conn:
+        return [name for (name,) in conn.execute(select(schema_migration.c.name).order_by(schema_migration.c.name))]
+
+
+def pending_migrations(bind: Engine) -> List[str]:
+    applied = set(applied_migrations(bind))
+    return [name for name in MIGRATIONS if name not in applied]
+
+
+@contextmanager
+def migration_lock(bind: Engine, timeout: int = 60):
+    # Keeps two deploys from running the same DDL at once. SQLite serializes
+    # writers on its own.
+    if bind.dialect.name != "mysql":
+        yield
+        return
+    with bind.connect() as conn:
+        if not conn.execute(text("SELECT GET_LOCK('schema_migration', :timeout)"), {"timeout": timeout}).scalar():
+            raise RuntimeError("Another migration is running")
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT RELEASE_LOCK('schema_migration')"))
+
+
+def migrate(bind: Engine) -> List[str]:
+    with migration_lock(bind):
+        schema_migration.create(bind, checkfirst=True)
+        applied = []
+        for name in pending_migrations(bind):
+            logger.info("Applying migration %s", name)
+            importlib.import_module(f"{__name__}.{name}").upgrade(bind)
+            with bind.begin() as conn:
+                conn.execute(schema_migration.insert().values(name=name))
+            applied.append(name)
+        return applied
@@ -0,0 +1,25 @@
+import argparse
+import logging
+
+from app.database import engine
+from app.migrations import MIGRATIONS, applied_migrations, migrate
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations.")
+    parser.add_argument("--status", action="store_true", help="list migrations without applying them")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.status:
+        applied = set(applied_migrations(engine))
+        for name in MIGRATIONS:
+            print(f"{'applied' if name in applied else 'pending'}  {name}")
+        return
+
+    applied = migrate(engine)
+    print(f"Applied {len(applied)} migration(s)" + (f": {', '.join(applied)}" if applied else ""))
+
+
+if __name__ == "__main__":
+    main()
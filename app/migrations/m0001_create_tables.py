@@ -0,0 +1,10 @@
+from sqlalchemy.engine import Engine
+
+from app.database import Base
+from app.models import categories, dataset, menus, places, reviews, users, visitedplaces  # noqa: F401
+
+
+def upgrade(bind: Engine) -> None:
+    # Creates the tables that do not exist yet, including place_ranking;
+    # existing tables are left alone.
+    Base.metadata.create_all(bind=bind)
@@ -0,0 +1,24 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn
+
+from app.database import Base
+from app.models import categories, dataset, menus, places, reviews, users, visitedplaces  # noqa: F401
+
+
+def upgrade(bind: Engine) -> None:
+    # create_all only creates missing tables. Columns added to existing tables
+    # (like the row `version` columns) are added here; they all carry a server
+    # default or are nullable so existing rows stay valid.
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                table_name = bind.dialect.identifier_preparer.format_table(table)
+                ddl = CreateColumn(column).compile(dialect=bind.dialect)
+                conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {ddl}"))
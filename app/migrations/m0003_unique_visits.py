@@ -0,0 +1,55 @@
+from sqlalchemy import func, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models import categories, dataset, menus, places, reviews, users, visitedplaces  # noqa: F401
+from app.models.visitedplaces import VisitedPlace
+
+
+def merge_duplicate_visits(db: Session) -> int:
+    """
+    Folds duplicate (user_id, place_id) rows, left over from before the unique
+    index existed, into the row with the lowest id.
+    """
+    duplicates = (
+        db.query(
+            VisitedPlace.user_id,
+            VisitedPlace.place_id,
+            func.min(VisitedPlace.id),
+            func.sum(func.coalesce(VisitedPlace.visit_count, 1))
+        )
+        .group_by(VisitedPlace.user_id, VisitedPlace.place_id)
+        .having(func.count(VisitedPlace.id) > 1)
+        .all()
+    )
+    for user_id, place_id, keep_id, visit_count in duplicates:
+        db.query(VisitedPlace).filter(VisitedPlace.id == keep_id).update(
+            {VisitedPlace.visit_count: visit_count}, synchronize_session=False
+        )
+        db.query(VisitedPlace).filter(
+            VisitedPlace.user_id == user_id,
+            VisitedPlace.place_id == place_id,
+            VisitedPlace.id != keep_id
+        ).delete(synchronize_session=False)
+    db.commit()
+    return len(duplicates)
+
+
+def add_missing_indexes(bind: Engine) -> None:
+    inspector = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind)
+
+
+def upgrade(bind: Engine) -> None:
+    # Duplicates are merged first, otherwise the unique
+    # (user_id, place_id) index cannot be created.
+    with Session(bind) as db:
+        merge_duplicate_visits(db)
+    add_missing_indexes(bind)
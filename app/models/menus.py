@@ -9,5 +9,8 @@ class Menu(Base):
     place_id = Column(Integer, ForeignKey("place.id"), nullable=False)
     menu = Column(String(255), nullable=False)
     price = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False, server_default="1")
 
     place = relationship("Place", back_populates="menus")
+
+    __mapper_args__ = {"version_id_col": version}
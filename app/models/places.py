@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -14,12 +14,15 @@ class Place(Base):
     category_id = Column(Integer, ForeignKey("category.id"))
     pos_x = Column(Float, nullable=False)
     pos_y = Column(Float, nullable=False)
+    version = Column(Integer, nullable=False, server_default="1")
 
     visited_places = relationship("VisitedPlace", back_populates="place")
     menus = relationship("Menu", back_populates="place")
     reviews = relationship("Review", back_populates="place")
     category = relationship("Category", back_populates="places")
 
+    __mapper_args__ = {"version_id_col": version}
+
     
 class NaverPlace(Base):
     __tablename__ = "n_place"
@@ -30,9 +33,12 @@ class NaverPlace(Base):
     score = Column(Float)
     review_count = Column(Integer, nullable=False)
     subcategory_id = Column(Integer, ForeignKey("category.id"))
+    version = Column(Integer, nullable=False, server_default="1")
 
     category = relationship("Category", back_populates="naver_places")
 
+    __mapper_args__ = {"version_id_col": version}
+
 
 class KakaoPlace(Base):
     __tablename__ = "k_place"
@@ -43,5 +49,23 @@ class KakaoPlace(Base):
     score = Column(Float)
     review_count = Column(Integer, nullable=False)
     subcategory_id = Column(Integer, ForeignKey("category.id"))
+    version = Column(Integer, nullable=False, server_default="1")
 
     category = relationship("Category", back_populates="kakao_places")
+
+    __mapper_args__ = {"version_id_col": version}
+
+
+class PlaceRanking(Base):
+    __tablename__ = "place_ranking"
+    place_id = Column(Integer, ForeignKey("place.id"), primary_key=True)
+    score = Column(Float)
+    review_count = Column(Float)
+    max_score = Column(Float, nullable=False, default=0)
+    max_review_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_place_ranking_score", "score", "review_count", "place_id"),
+        Index("ix_place_ranking_max_score", "max_score", "place_id"),
+        Index("ix_place_ranking_max_review_count", "max_review_count", "place_id"),
+    )
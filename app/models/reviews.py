@@ -10,6 +10,22 @@ class Review(Base):
     place_id = Column(Integer, ForeignKey("place.id"), nullable=False)
     comment = Column(String(255), nullable=False)
     score = Column(Float)
+    version = Column(Integer, nullable=False, server_default="1")
 
     user = relationship("User", back_populates="reviews")
     place = relationship("Place", back_populates="reviews")
+
+    __mapper_args__ = {"version_id_col": version}
+
+
+class PlaceReviewSummary(Base):
+    __tablename__ = "place_review_summary"
+    place_id = Column(Integer, ForeignKey("place.id"), primary_key=True)
+    review_count = Column(Integer, nullable=False, default=0)
+    score_count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0)
+    score_1 = Column(Integer, nullable=False, default=0)
+    score_2 = Column(Integer, nullable=False, default=0)
+    score_3 = Column(Integer, nullable=False, default=0)
+    score_4 = Column(Integer, nullable=False, default=0)
+    score_5 = Column(Integer, nullable=False, default=0)
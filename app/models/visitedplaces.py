@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -12,3 +12,7 @@ class VisitedPlace(Base):
     
     user = relationship("User", back_populates="visited_places")
     place = relationship("Place", back_populates="visited_places")
+
+    __table_args__ = (
+        Index("ux_visited_place_user_place", "user_id", "place_id", unique=True),
+    )
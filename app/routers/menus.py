@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import Request, Response, APIRouter, HTTPException, Depends
 from fastapi_pagination import Page, Params, paginate, add_pagination
 
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.schemas.menus import MenuResponse
 from app.crud import menus
+from app.utils.etag import not_modified
 
 router = APIRouter(
     prefix="/menus",
@@ -15,11 +16,17 @@ add_pagination(router)
 
 
 @router.get("/{place_id}", response_model=Page[MenuResponse])
-async def get_menu_by_place_id(
+def get_menu_by_place_id(
     place_id: int, 
+    request: Request,
+    response: Response,
     params: Params = Depends(), 
     db: Session = Depends(get_db)
 ):
+    unchanged = not_modified(request, response, menus.get_menu_version(db, place_id))
+    if unchanged:
+        return unchanged
+
     menu = menus.get_menu_by_place_id(db, place_id)
     if not menu:
         raise HTTPException(status_code=404, detail="menu not found")
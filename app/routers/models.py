@@ -0,0 +1,38 @@
+import hmac
+import os
+from typing import Optional
+
+from fastapi import Request, APIRouter, HTTPException, Depends, Header
+
+# Reloads are disabled unless MODEL_ADMIN_TOKEN is set; callers send it in the
+# X-Admin-Token header. MODEL_VERSIONS optionally limits the versions that can
+# be loaded to a comma-separated allowlist.
+MODEL_ADMIN_TOKEN = os.getenv("MODEL_ADMIN_TOKEN")
+MODEL_VERSIONS = {version.strip() for version in os.getenv("MODEL_VERSIONS", "").split(",") if version.strip()}
+
+router = APIRouter(
+    prefix="/models",
+    tags=["models"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not MODEL_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="model reloads are disabled")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, MODEL_ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="invalid admin token")
+
+
+@router.get("/")
+async def get_model_status(request: Request):
+    return request.app.state.registry.status()
+
+
+@router.post("/reload", status_code=202, dependencies=[Depends(require_admin)])
+async def reload_models(request: Request, version: str = "main"):
+    if MODEL_VERSIONS and version not in MODEL_VERSIONS:
+        raise HTTPException(status_code=400, detail=f"model version {version} is not allowed")
+    if not request.app.state.registry.reload(version):
+        raise HTTPException(status_code=409, detail="a model version is already loading")
+    return {"detail": f"loading model version {version}"}
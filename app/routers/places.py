@@ -1,5 +1,5 @@
-from fastapi import Request, APIRouter, HTTPException, Depends
-from fastapi_pagination import Page, Params, paginate, add_pagination
+from fastapi import Request, Response, APIRouter, HTTPException, Depends
+from fastapi_pagination import Page, Params, paginate, create_page, add_pagination
 
 from typing import Optional, Union
 
@@ -11,9 +11,15 @@ from app.schemas.places import (
     NaverPlaceInfoResponse,
     KakaoPlaceInfoResponse,
     ContentBasedRecommedRequest,
-    CollaborativeBasedRecommendRequest
+    CollaborativeBasedRecommendRequest,
+    PlaceBatchRequest,
+    PlaceBatchResponse
 )
+from app.schemas.pagination import CursorPage
 from app.crud import places
+from app.dependencies import requirePlaceFeatures, requireReady
+from app.utils.etag import make_etag, not_modified
+from app.utils.inference import InferenceUnavailable
 
 
 router = APIRouter(
@@ -24,16 +30,55 @@ router = APIRouter(
 add_pagination(router)
 
 
+@router.get("/cursor", response_model=CursorPage[PlaceDetailsResponse])
+def get_places_by_cursor(
+    sort_by: str = "name",
+    order: Optional[str] = "desc",
+    cursor: Optional[str] = None,
+    page_size: Optional[int] = 10,
+    db: Session = Depends(get_db)
+):
+    limit = min(page_size, 50)
+    try:
+        place_list, next_cursor = places.get_places_after(db, sort_by, order, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not place_list:
+        raise HTTPException(status_code=404, detail="places not found")
+    return CursorPage(items=place_list, size=limit, next_cursor=next_cursor)
+
+
+@router.post("/batch", response_model=PlaceBatchResponse[PlaceDetailsResponse])
+def get_places_batch(payload: PlaceBatchRequest, db: Session = Depends(get_db)):
+    place_list = places.get_places_details(db, payload.place_ids)
+    missing = [place_id for place_id, place in zip(payload.place_ids, place_list) if place is None]
+    return PlaceBatchResponse[PlaceDetailsResponse](items=place_list, missing=missing)
+
+
+@router.post("/batch/coordinates", response_model=PlaceBatchResponse[LatitudeLongitudeResponse])
+def get_places_coordinates_batch(payload: PlaceBatchRequest, db: Session = Depends(get_db)):
+    coordinates = places.get_places_coordinates(db, payload.place_ids)
+    missing = [place_id for place_id, coordinate in zip(payload.place_ids, coordinates) if coordinate is None]
+    return PlaceBatchResponse[LatitudeLongitudeResponse](items=coordinates, missing=missing)
+
+
 @router.get("/{place_id}", response_model=PlaceDetailsResponse)
-async def get_place_by_id(place_id: int, db: Session = Depends(get_db)):
-    place = places.get_place_by_id(db, place_id)
+def get_place_by_id(place_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    version = places.get_place_version(db, place_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="place not found")
+    unchanged = not_modified(request, response, version)
+    if unchanged:
+        return unchanged
+
+    place = places.get_place_by_id(db, place_id, make_etag(version))
     if not place:
         raise HTTPException(status_code=404, detail="place not found")
     return place
 
 
 @router.get("/{place_id}/naver", response_model=NaverPlaceInfoResponse)
-async def get_naver_place(place_id: int, db: Session = Depends(get_db)):
+def get_naver_place(place_id: int, db: Session = Depends(get_db)):
     naver_info = places.get_naver_place_info(db, place_id)
     if not naver_info:
         raise HTTPException(status_code=404, detail="Naver place info not found")
@@ -41,7 +86,7 @@ async def get_naver_place(place_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/{place_id}/kakao", response_model=KakaoPlaceInfoResponse)
-async def get_kakao_place(place_id: int, db: Session = Depends(get_db)):
+def get_kakao_place(place_id: int, db: Session = Depends(get_db)):
     kakao_info = places.get_kakao_place_info(db, place_id)
     if not kakao_info:
         raise HTTPException(status_code=404, detail="Kakao place info not found")
@@ -49,7 +94,7 @@ async def get_kakao_place(place_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/name/{place_name}", response_model=PlaceDetailsResponse)
-async def get_place_by_name(place_name: str, db: Session = Depends(get_db)):
+def get_place_by_name(place_name: str, db: Session = Depends(get_db)):
     place = places.get_place_by_name(db, place_name)
     if not place:
         raise HTTPException(status_code=404, detail="place not found")
@@ -57,7 +102,7 @@ async def get_place_by_name(place_name: str, db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=Page[PlaceDetailsResponse])
-async def get_places(
+def get_places(
     sort_by: Union[str, None] = None,
     order: Optional[str] = "desc",
     page_size: Optional[int] = 10,
@@ -70,11 +115,11 @@ async def get_places(
     place_list = places.get_places(db, sort_by, order, offset, limit)
     if not place_list:
         raise HTTPException(status_code=404, detail="places not found")
-    return paginate(place_list, params)
+    return create_page(place_list, total=places.count_places(db, sort_by), params=params)
 
 
 @router.get("/{place_id}/coordinates", response_model=LatitudeLongitudeResponse)
-async def get_place_coordinate(place_id: int, db: Session = Depends(get_db)):
+def get_place_coordinate(place_id: int, db: Session = Depends(get_db)):
     coordinate = places.get_place_coordinate(db, place_id)
     if not coordinate:
         raise HTTPException(status_code=404, detail="coordinate not found")
@@ -82,37 +127,38 @@ async def get_place_coordinate(place_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/recommend/cluster/{user_id}", response_model=Page[PlaceDetailsResponse])
-async def get_cluster_based_recommend(
+def get_cluster_based_recommend(
     user_id: int, 
     request: Request, 
     params: Params = Depends(), 
     db: Session = Depends(get_db)
 ):
     params.size = 10
-    model = request.app.state.c_model
-    tafp_df = request.app.state.tafp_df
-    place_list = places.get_cluster_based_recommend(db, model, tafp_df, user_id)
+    cluster_table = requireReady(request).cluster_table
+    place_list = places.get_cluster_based_recommend(db, cluster_table, user_id)
     if not place_list:
         raise HTTPException(status_code=404, detail="places not found")
     return paginate(place_list, params)
 
 
 @router.post("/recommend/content/{category}", response_model=Page[PlaceDetailsResponse])
-async def get_content_based_recommend(
+def get_content_based_recommend(
     category : str, 
     payload: ContentBasedRecommedRequest, 
+    request: Request, 
     params: Params = Depends(), 
     db: Session = Depends(get_db)
 ):
     params.size = 10
-    place_list = places.get_content_based_recommend(db, category, payload)
+    place_features = requirePlaceFeatures(request)
+    place_list = places.get_content_based_recommend(db, category, payload, place_features)
     if not place_list:
         raise HTTPException(status_code=404, detail="places not found")
     return paginate(place_list, params)
 
 
 @router.post("/recommend/collaborative/{category}", response_model=Page[PlaceDetailsResponse])
-async def get_collaborative_based_recommend(
+def get_collaborative_based_recommend(
     category : str, 
     payload: CollaborativeBasedRecommendRequest, 
     request: Request, 
@@ -120,8 +166,13 @@ async def get_collaborative_based_recommend(
     db: Session = Depends(get_db)
 ):
     params.size = 10
-    model = request.app.state.cf_model
-    place_list = places.get_collaborative_based_recommend(db, model, category, payload)
+    state = requireReady(request)
+    try:
+        place_list = places.get_collaborative_based_recommend(
+            db, state.cf_predictor, category, payload, state.cf_scorer, state.cf_universe
+        )
+    except InferenceUnavailable:
+        raise HTTPException(status_code=503, detail="recommendation service is busy")
     if not place_list:
         raise HTTPException(status_code=404, detail="places not found")
     return paginate(place_list, params)
@@ -1,13 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi_pagination import Page, Params, paginate, add_pagination
+from fastapi import Request, Response, APIRouter, HTTPException, Depends
+from fastapi_pagination import add_pagination
+
+from typing import Optional
 
 from sqlalchemy.orm import Session
 from app.database import get_db
+from app.schemas.pagination import CursorPage
 from app.schemas.reviews import (
     ReviewResponse, 
-    ReviewsCreateRequest
+    ReviewsCreateRequest,
+    ReviewSummaryResponse
 )
 from app.crud import reviews
+from app.utils.etag import not_modified
 
 router = APIRouter(
     prefix="/reviews",
@@ -17,26 +22,47 @@ router = APIRouter(
 add_pagination(router)
 
 
-@router.get("/{place_id}", response_model=Page[ReviewResponse])
-async def get_review_by_id(
+@router.get("/{place_id}", response_model=CursorPage[ReviewResponse])
+def get_review_by_id(
     place_id: int, 
-    params: Params = Depends(),
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    size: Optional[int] = 50,
     db: Session = Depends(get_db)
 ):
-    review = reviews.get_review_by_id(db, place_id)
+    unchanged = not_modified(request, response, reviews.get_review_version(db, place_id))
+    if unchanged:
+        return unchanged
+
+    limit = min(size, 100)
+    try:
+        review, next_cursor = reviews.get_review_by_id(db, place_id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not review:
         raise HTTPException(status_code=404, detail="review not found")
-    return paginate(review, params)
+    return CursorPage(items=review, size=limit, next_cursor=next_cursor)
+
+
+@router.get("/{place_id}/summary", response_model=ReviewSummaryResponse)
+def get_review_summary(place_id: int, db: Session = Depends(get_db)):
+    summary = reviews.get_review_summary(db, place_id)
+    if not summary:
+        raise HTTPException(status_code=404, detail="place not found")
+    return summary
 
 
 @router.post("/")
-async def create_review(review: ReviewsCreateRequest, db: Session = Depends(get_db)):
+def create_review(review: ReviewsCreateRequest, db: Session = Depends(get_db)):
     new_review = reviews.create_review(db, review)
+    if not new_review:
+        raise HTTPException(status_code=404, detail="place not found")
     return new_review
 
 
 @router.delete("/{review_id}", status_code=204)
-async def delete_review(review_id: int, db: Session = Depends(get_db)):
+def delete_review(review_id: int, db: Session = Depends(get_db)):
     success = reviews.delete_review(db, review_id)
     if not success:
         raise HTTPException(status_code=404, detail="Review not found")
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi_pagination import Page, Params, paginate, add_pagination
+from fastapi import Request, APIRouter, HTTPException, Depends
+from fastapi_pagination import Page, Params, create_page, add_pagination
+
+from typing import List
 
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.schemas.search import SearchResponse
+from app.schemas.search import SearchResponse, AutocompleteResponse
 from app.crud import search
+from app.utils.autocomplete import MAX_SUGGESTIONS
 
 router = APIRouter(
     prefix="/search",
@@ -15,12 +18,26 @@ add_pagination(router)
 
 
 @router.get("/{keyword}", response_model=Page[SearchResponse])
-async def search_keyword(
+def search_keyword(
     keyword: str, 
+    request: Request, 
     params: Params = Depends(),
     db: Session = Depends(get_db)
 ):
-    result = search.search_keyword(db, keyword)
+    index = getattr(request.app.state, "search_index", None)
+    offset = (params.page - 1) * params.size
+    result, total = search.search_keyword(db, keyword, offset, params.size, index)
     if not result:
         raise HTTPException(status_code=404, detail="Search not found")
-    return paginate(result, params)
+    return create_page(result, total=total, params=params)
+
+
+@router.get("/autocomplete/{prefix}", response_model=List[AutocompleteResponse])
+def autocomplete(prefix: str, request: Request, size: int = 10):
+    index = getattr(request.app.state, "autocomplete_index", None)
+    if index is None:
+        raise HTTPException(status_code=503, detail="Autocomplete is not ready")
+    return [
+        AutocompleteResponse(text=suggestion.text, type=suggestion.type, place_id=suggestion.place_id)
+        for suggestion in index.complete(prefix, min(size, MAX_SUGGESTIONS))
+    ]
@@ -15,7 +15,7 @@ add_pagination(router)
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user(user_id: int, db: Session = Depends(get_db)):
+def get_user(user_id: int, db: Session = Depends(get_db)):
     user = users.get_user_by_id(db, user_id)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
@@ -23,7 +23,7 @@ async def get_user(user_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=UserResponse)
-async def login(user: UserLoginRequest, db: Session = Depends(get_db)):
+def login(user: UserLoginRequest, db: Session = Depends(get_db)):
     user = users.login(db, user)
     if not user:
         raise HTTPException( status_code=401, detail="Invalid email or password")
@@ -31,7 +31,7 @@ async def login(user: UserLoginRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/register", response_model=UserResponse)
-async def register(user: UserCreateRequest, db: Session = Depends(get_db)):
+def register(user: UserCreateRequest, db: Session = Depends(get_db)):
     user = users.register(db, user)
     if not user:
         raise HTTPException( status_code=401, detail="Invalid email or password")
@@ -39,7 +39,7 @@ async def register(user: UserCreateRequest, db: Session = Depends(get_db)):
 
 
 @router.delete("/{user_id}", status_code=204)
-async def delete_user(user_id: int, db: Session = Depends(get_db)):
+def delete_user(user_id: int, db: Session = Depends(get_db)):
     success = users.delete_user(db, user_id)
     if not success:
         raise HTTPException(status_code=404, detail="User not found")
@@ -3,7 +3,12 @@ from fastapi_pagination import Page, Params, paginate, add_pagination
 
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.schemas.visitedplaces import VisitedPlaceCreateRequest, VisitedPlaceResponse
+from app.schemas.visitedplaces import (
+    VisitedPlaceCreateRequest,
+    VisitedPlaceResponse,
+    VisitBatchRequest,
+    VisitBatchResponse
+)
 
 from app.schemas.places import PlaceDetailsResponse
 from app.crud import visitedplaces
@@ -17,13 +22,20 @@ add_pagination(router)
 
 
 @router.post("/visit", response_model=VisitedPlaceResponse)
-async def add_visited_place(place: VisitedPlaceCreateRequest, db: Session = Depends(get_db)):
+def add_visited_place(place: VisitedPlaceCreateRequest, db: Session = Depends(get_db)):
     visited_place = visitedplaces.add_visited_place(db, place)
+    if visited_place is None:
+        raise HTTPException(status_code=404, detail="User or place not found")
     return visited_place
 
 
+@router.post("/visits", response_model=VisitBatchResponse)
+def add_visited_places(batch: VisitBatchRequest, db: Session = Depends(get_db)):
+    return visitedplaces.add_visited_places(db, batch)
+
+
 @router.get("/{user_id}", response_model=Page[PlaceDetailsResponse])
-async def get_visited_place(user_id: int, params: Params = Depends(), db: Session = Depends(get_db)):
+def get_visited_place(user_id: int, params: Params = Depends(), db: Session = Depends(get_db)):
     visited_places = visitedplaces.get_visited_place_by_user(db, user_id)
     if not visited_places:
         raise HTTPException(status_code=404, detail="No visited places found for this user")
@@ -1,5 +1,11 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Generic, List, Optional, TypeVar
+
+from app.schemas.reviews import ReviewSummaryResponse
+
+T = TypeVar("T")
+
+MAX_BATCH_SIZE = 300
 
 class LatitudeLongitudeResponse(BaseModel):
     latitude: float
@@ -33,6 +39,7 @@ class PlaceDetailsResponse(BaseModel):
     basic_info: BasicPlaceInfoResponse
     naver_info: Optional[NaverPlaceInfoResponse] = None
     kakao_info: Optional[KakaoPlaceInfoResponse] = None
+    review_summary: Optional[ReviewSummaryResponse] = None
 
 
 class ContentBasedRecommedRequest(BaseModel):
@@ -47,3 +54,12 @@ class CollaborativeBasedRecommendRequest(BaseModel):
     latitude: float
     longitude: float
     top_n: int
+
+
+class PlaceBatchRequest(BaseModel):
+    place_ids: List[int] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class PlaceBatchResponse(BaseModel, Generic[T]):
+    items: List[Optional[T]]
+    missing: List[int] = []
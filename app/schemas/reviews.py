@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, Optional
 
 class ReviewsCreateRequest(BaseModel):
     place_id: int
@@ -16,3 +16,10 @@ class ReviewResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class ReviewSummaryResponse(BaseModel):
+    place_id: int
+    review_count: int
+    average_score: Optional[float]
+    histogram: Dict[int, int]
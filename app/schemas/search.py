@@ -1,7 +1,13 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class SearchResponse(BaseModel):
+    place_id: int
+    place_name: str
+    menus: List[str] = []
+
+
+class AutocompleteResponse(BaseModel):
+    text: str
+    type: str
     place_id: Optional[int]
-    place_name: Optional[str]
-    menu_name: Optional[str]
@@ -1,4 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List
+
+MAX_VISIT_EVENTS = 1000
 
 class VisitedPlaceResponse(BaseModel):
     place_id: int
@@ -8,3 +11,19 @@ class VisitedPlaceResponse(BaseModel):
 class VisitedPlaceCreateRequest(BaseModel):
     place_id: int
     user_id: int
+
+
+class VisitEvent(BaseModel):
+    user_id: int
+    place_id: int
+    count: int = Field(default=1, ge=1)
+
+
+class VisitBatchRequest(BaseModel):
+    events: List[VisitEvent] = Field(min_length=1, max_length=MAX_VISIT_EVENTS)
+
+
+class VisitBatchResponse(BaseModel):
+    accepted: int
+    rejected: List[VisitEvent] = []
+    visits: List[VisitedPlaceResponse] = []
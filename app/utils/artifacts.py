@@ -0,0 +1,173 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.database import BASE_DIR
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", os.path.join(BASE_DIR, "artifacts"))
+MANIFEST_FILE = "manifest.json"
+COMMIT_SHA = re.compile(r"[0-9a-f]{40}")
+
+_manifest_lock = threading.Lock()
+
+
+class ArtifactChecksumError(Exception):
+    pass
+
+
+@dataclass
+class Artifact:
+    name: str
+    repo_id: str
+    filename: str
+    loader: Callable[[str], Any]
+
+
+def load_keras_model(path: str):
+    os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
+    from tensorflow.keras.models import load_model
+    from tensorflow.keras.losses import MeanSquaredError
+
+    return load_model(path, custom_objects={"mse": MeanSquaredError()})
+
+
+def sha256sum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_manifest(artifact_dir: str) -> Dict[str, str]:
+    path = os.path.join(artifact_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def pin(artifact_dir: str, key: str, value: str) -> None:
+    with _manifest_lock:
+        os.makedirs(artifact_dir, exist_ok=True)
+        manifest = read_manifest(artifact_dir)
+        manifest[key] = value
+        # Replaced in one step: fetches on other threads read it without the lock.
+        path = os.path.join(artifact_dir, MANIFEST_FILE)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(f"{path}.tmp", path)
+
+
+def resolve_revision(
+    repo_id: str,
+    revision: Optional[str] = None,
+    token: Optional[str] = None,
+    artifact_dir: str = ARTIFACT_DIR,
+) -> str:
+    """
+    The commit SHA a branch or tag of `repo_id` points at, so artifacts are
+    cached per commit rather than per moving ref. The last resolved SHA is
+    kept in the manifest and used when the hub cannot be reached.
+    """
+    revision = revision or "main"
+    if COMMIT_SHA.fullmatch(revision):
+        return revision
+
+    key = os.path.join(repo_id.replace("/", "--"), "refs", revision)
+    try:
+        from huggingface_hub import HfApi
+
+        sha = HfApi().model_info(repo_id, revision=revision, token=token).sha
+    except Exception:
+        sha = read_manifest(artifact_dir).get(key)
+        if sha is None:
+            raise
+        logger.warning("Could not resolve %s@%s, using the last known commit %s", repo_id, revision, sha)
+        return sha
+
+    pin(artifact_dir, key, sha)
+    return sha
+
+
+def fetch_artifact(
+    artifact: Artifact,
+    token: Optional[str] = None,
+    artifact_dir: str = ARTIFACT_DIR,
+    revision: Optional[str] = None,
+) -> Tuple[str, str]:
+    revision = resolve_revision(artifact.repo_id, revision, token, artifact_dir)
+    target_dir = os.path.join(artifact_dir, artifact.repo_id.replace("/", "--"), revision)
+    key = os.path.relpath(os.path.join(target_dir, artifact.filename), artifact_dir)
+    path = os.path.join(target_dir, artifact.filename)
+    expected = read_manifest(artifact_dir).get(key)
+
+    if os.path.exists(path):
+        if expected is None or sha256sum(path) == expected:
+            return path, "local"
+        logger.warning("Checksum mismatch for %s, downloading it again", key)
+
+    from huggingface_hub import hf_hub_download
+
+    os.makedirs(target_dir, exist_ok=True)
+    path = hf_hub_download(
+        repo_id=artifact.repo_id,
+        filename=artifact.filename,
+        revision=revision,
+        token=token,
+        local_dir=target_dir,
+    )
+
+    checksum = sha256sum(path)
+    if expected is not None and checksum != expected:
+        raise ArtifactChecksumError(f"{key} does not match its pinned checksum")
+    if expected is None:
+        pin(artifact_dir, key, checksum)
+    return path, "hub"
+
+
+def load_artifacts(
+    artifacts: List[Artifact],
+    token: Optional[str] = None,
+    artifact_dir: str = ARTIFACT_DIR,
+    revision: Optional[str] = None,
+) -> Tuple[Dict[str, Any], Dict[str, dict]]:
+    # Resolved once per repository so artifacts that share one come from the same commit.
+    revisions = {
+        repo_id: resolve_revision(repo_id, revision, token, artifact_dir)
+        for repo_id in sorted({artifact.repo_id for artifact in artifacts})
+    }
+
+    def load(artifact: Artifact):
+        started = time.perf_counter()
+        path, source = fetch_artifact(artifact, token, artifact_dir, revisions[artifact.repo_id])
+        fetched = time.perf_counter()
+        value = artifact.loader(path)
+        loaded = time.perf_counter()
+
+        timing = {
+            "source": source,
+            "revision": revisions[artifact.repo_id],
+            "fetch_ms": round((fetched - started) * 1000, 1),
+            "load_ms": round((loaded - fetched) * 1000, 1),
+        }
+        logger.info("Loaded %s from %s: %s", artifact.name, source, timing)
+        return value, timing
+
+    with ThreadPoolExecutor(max_workers=len(artifacts) or 1, thread_name_prefix="artifact") as executor:
+        futures = {artifact.name: executor.submit(load, artifact) for artifact in artifacts}
+        results = {name: future.result() for name, future in futures.items()}
+
+    return (
+        {name: value for name, (value, _) in results.items()},
+        {name: timing for name, (_, timing) in results.items()},
+    )
@@ -0,0 +1,120 @@
+import heapq
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.menus import Menu
+from app.models.places import Place, PlaceRanking
+
+CHOSUNG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+
+# Prefixes up to this length match a large share of the keys, so their best
+# MAX_SUGGESTIONS matches are ranked once when the index is built.
+SHORT_PREFIX_LENGTH = 1
+MAX_SUGGESTIONS = 50
+
+
+def to_chosung(text: str) -> str:
+    return "".join(
+        CHOSUNG[(ord(char) - 0xAC00) // 588] if "가" <= char <= "힣" else char
+        for char in text
+    )
+
+
+def is_chosung_query(text: str) -> bool:
+    return any(char in CHOSUNG for char in text) and all(
+        char in CHOSUNG or not ("가" <= char <= "힣") for char in text
+    )
+
+
+class Suggestion(NamedTuple):
+    text: str
+    type: str
+    place_id: Optional[int]
+    popularity: float
+
+
+class AutocompleteIndex:
+    """
+    Sorted prefix keys (full text, word starts and their 초성) over place names and
+    menu items, answered with bisect and ranked by popularity. Short prefixes are
+    answered from rankings computed at build time.
+    """
+
+    def __init__(self, suggestions: List[Suggestion]):
+        self.suggestions = suggestions
+
+        keys, chosung_keys = [], []
+        for position, suggestion in enumerate(suggestions):
+            text = suggestion.text.lower()
+            starts = [0] + [i + 1 for i, char in enumerate(text) if char == " " and i + 1 < len(text)]
+            for start in starts:
+                keys.append((text[start:], position))
+                chosung_keys.append((to_chosung(text[start:]), position))
+
+        keys.sort()
+        chosung_keys.sort()
+        self._keys = [key for key, _ in keys]
+        self._positions = [position for _, position in keys]
+        self._chosung_keys = [key for key, _ in chosung_keys]
+        self._chosung_positions = [position for _, position in chosung_keys]
+        self._top = self._rank_short_prefixes(self._keys, self._positions)
+        self._chosung_top = self._rank_short_prefixes(self._chosung_keys, self._chosung_positions)
+
+    @classmethod
+    def from_db(cls, db: Session) -> "AutocompleteIndex":
+        popularity = dict(db.query(PlaceRanking.place_id, PlaceRanking.max_review_count).all())
+
+        suggestions = [
+            Suggestion(name, "place", place_id, float(popularity.get(place_id, 0)))
+            for place_id, name in db.query(Place.id, Place.name).all()
+        ]
+
+        menu_popularity = defaultdict(float)
+        for menu, place_id in db.query(func.trim(Menu.menu), Menu.place_id).distinct().all():
+            if menu:
+                menu_popularity[menu] += popularity.get(place_id, 0)
+        suggestions.extend(
+            Suggestion(menu, "menu", None, score) for menu, score in menu_popularity.items()
+        )
+        return cls(suggestions)
+
+    def __len__(self) -> int:
+        return len(self.suggestions)
+
+    def complete(self, prefix: str, k: int = 10) -> List[Suggestion]:
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+
+        if is_chosung_query(prefix):
+            keys, positions, top = self._chosung_keys, self._chosung_positions, self._chosung_top
+            prefix = to_chosung(prefix)
+        else:
+            keys, positions, top = self._keys, self._positions, self._top
+
+        if len(prefix) <= SHORT_PREFIX_LENGTH and k <= MAX_SUGGESTIONS:
+            best = top.get(prefix, [])[:k]
+        else:
+            best = self._best(keys, positions, prefix, k)
+        return [self.suggestions[position] for position in best]
+
+    def _rank_short_prefixes(self, keys: List[str], positions: List[int]) -> Dict[str, List[int]]:
+        return {
+            prefix: self._best(keys, positions, prefix, MAX_SUGGESTIONS)
+            for length in range(1, SHORT_PREFIX_LENGTH + 1)
+            for prefix in {key[:length] for key in keys if len(key) >= length}
+        }
+
+    def _best(self, keys: List[str], positions: List[int], prefix: str, k: int) -> List[int]:
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + "\uffff", lo=start)
+
+        matches = {positions[i] for i in range(start, end)}
+        return heapq.nlargest(
+            k, matches,
+            key=lambda position: (self.suggestions[position].popularity, -position)
+        )
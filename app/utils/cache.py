@@ -0,0 +1,313 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from pydantic import BaseModel
+
+from app.schemas.places import (
+    KakaoPlaceInfoResponse,
+    LatitudeLongitudeResponse,
+    NaverPlaceInfoResponse,
+    PlaceDetailsResponse
+)
+
+logger = logging.getLogger(__name__)
+
+PLACE_CACHE_SIZE = int(os.getenv("PLACE_CACHE_SIZE", 4096))
+PLACE_CACHE_TTL = float(os.getenv("PLACE_CACHE_TTL", 300))
+PLACE_CACHE_REDIS_URL = os.getenv("PLACE_CACHE_REDIS_URL")
+# With a shared tier, how long a worker may serve an entry another worker has
+# invalidated.
+PLACE_CACHE_LOCAL_TTL = float(os.getenv("PLACE_CACHE_LOCAL_TTL", 10))
+
+
+class LRUCache:
+    """
+    In-process LRU cache with a per-entry TTL and a bound on the number of entries.
+    """
+
+    def __init__(self, max_size: int = 4096, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def delete(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self._stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats["invalidations"] += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        stats["max_size"] = self.max_size
+        stats["ttl"] = self.ttl
+        return stats
+
+
+class LocalCacheBackend:
+    """
+    Stand-in for a shared cache. Values are stored serialized, like they would be
+    in Redis, so it behaves the same way when swapped for `RedisCacheBackend`.
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[str, tuple] = {}
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        now = time.monotonic()
+        with self._lock:
+            entries = [self._entries.get(key) for key in keys]
+        return [entry[0] if entry and entry[1] > now else None for entry in entries]
+
+    def set_many(self, values: Dict[str, bytes]) -> None:
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries.update((key, (value, expires_at)) for key, value in values.items())
+
+    def delete(self, keys: List[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self, prefix: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+
+class RedisCacheBackend:
+    def __init__(self, url: str, ttl: float = 300.0):
+        import redis
+
+        self.ttl = ttl
+        self._client = redis.Redis.from_url(url)
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return self._client.mget(keys) if keys else []
+
+    def set_many(self, values: Dict[str, bytes]) -> None:
+        pipeline = self._client.pipeline(transaction=False)
+        for key, value in values.items():
+            pipeline.set(key, value, ex=max(int(self.ttl), 1))
+        pipeline.execute()
+
+    def delete(self, keys: List[str]) -> None:
+        if keys:
+            self._client.delete(*keys)
+
+    def clear(self, prefix: str) -> None:
+        keys = list(self._client.scan_iter(match=f"{prefix}*", count=1000))
+        if keys:
+            self._client.delete(*keys)
+
+
+class ModelSerializer:
+    """
+    Serializes cached pydantic models as JSON for the shared tier. The model
+    class is picked by the part of the key before the first ":".
+    """
+
+    def __init__(self, models: Dict[str, Type[BaseModel]]):
+        self.models = models
+
+    def dumps(self, key: str, value: BaseModel) -> bytes:
+        return value.model_dump_json().encode()
+
+    def loads(self, key: str, data: bytes) -> BaseModel:
+        return self.models[key.split(":", 1)[0]].model_validate_json(data)
+
+
+class TieredCache:
+    """
+    L1 is a per-process `LRUCache`, L2 an optional shared backend storing values
+    encoded by `serializer`. Reads fall through L1 -> L2 -> loader and fill the
+    tiers on the way back. Shared backend errors and undecodable entries are
+    logged and treated as misses so the cache never fails a request.
+
+    Invalidation reaches L2 and the L1 of the calling process only: other
+    processes keep serving their L1 copy until it expires, so with a shared
+    tier the L1 TTL bounds how stale a read can be.
+    """
+
+    def __init__(self, prefix: str, local: LRUCache, shared=None, serializer: Optional[ModelSerializer] = None):
+        if shared is not None and serializer is None:
+            raise ValueError("a shared cache backend needs a serializer")
+        self.prefix = prefix
+        self.local = local
+        self.shared = shared
+        self.serializer = serializer
+        self._lock = threading.Lock()
+        self._stats = {"shared_hits": 0, "shared_misses": 0, "shared_errors": 0}
+
+    def _key(self, key) -> str:
+        return f"{self.prefix}:{key}"
+
+    def _count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += value
+
+    def get_many(self, keys: List) -> Dict[Any, Any]:
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.local.get(self._key(key))
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+
+        if self.shared is None or not missing:
+            return found
+
+        try:
+            values = self.shared.get_many([self._key(key) for key in missing])
+        except Exception:
+            logger.exception("Shared cache read failed")
+            self._count("shared_errors")
+            return found
+
+        for key, value in zip(missing, values):
+            if value is None:
+                self._count("shared_misses")
+                continue
+            try:
+                found[key] = self.serializer.loads(key, value)
+            except Exception:
+                logger.exception("Could not decode shared cache entry %s", self._key(key))
+                self._count("shared_errors")
+                continue
+            self._count("shared_hits")
+            self.local.set(self._key(key), found[key])
+        return found
+
+    def get(self, key) -> Optional[Any]:
+        return self.get_many([key]).get(key)
+
+    def set_many(self, values: Dict[Any, Any]) -> None:
+        for key, value in values.items():
+            self.local.set(self._key(key), value)
+
+        if self.shared is None or not values:
+            return
+        try:
+            self.shared.set_many({
+                self._key(key): self.serializer.dumps(key, value) for key, value in values.items()
+            })
+        except Exception:
+            logger.exception("Shared cache write failed")
+            self._count("shared_errors")
+
+    def set(self, key, value) -> None:
+        self.set_many({key: value})
+
+    def delete(self, keys: Iterable) -> None:
+        keys = [self._key(key) for key in keys]
+        self.local.delete(keys)
+        if self.shared is None:
+            return
+        try:
+            self.shared.delete(keys)
+        except Exception:
+            logger.exception("Shared cache invalidation failed")
+            self._count("shared_errors")
+
+    def clear(self) -> None:
+        self.local.clear()
+        if self.shared is None:
+            return
+        try:
+            self.shared.clear(f"{self.prefix}:")
+        except Exception:
+            logger.exception("Shared cache invalidation failed")
+            self._count("shared_errors")
+
+    def stats(self) -> dict:
+        stats = self.local.stats()
+        with self._lock:
+            stats.update(self._stats)
+        stats["shared"] = type(self.shared).__name__ if self.shared is not None else None
+        return stats
+
+
+class VersionedPlaceDetails(BaseModel):
+    """
+    Place details cached together with the version (an ETag) they answer for,
+    so a conditional GET never pairs a new ETag with an older body.
+    """
+    version: str
+    details: PlaceDetailsResponse
+
+
+PLACE_CACHE_MODELS = {
+    "details": PlaceDetailsResponse,
+    "naver": NaverPlaceInfoResponse,
+    "kakao": KakaoPlaceInfoResponse,
+    "coordinates": LatitudeLongitudeResponse,
+    "versioned": VersionedPlaceDetails,
+}
+
+
+def create_place_cache() -> TieredCache:
+    if not PLACE_CACHE_REDIS_URL:
+        return TieredCache("place", LRUCache(PLACE_CACHE_SIZE, PLACE_CACHE_TTL))
+
+    if PLACE_CACHE_REDIS_URL == "local":
+        shared = LocalCacheBackend(PLACE_CACHE_TTL)
+    else:
+        shared = RedisCacheBackend(PLACE_CACHE_REDIS_URL, PLACE_CACHE_TTL)
+    local = LRUCache(PLACE_CACHE_SIZE, min(PLACE_CACHE_LOCAL_TTL, PLACE_CACHE_TTL))
+    return TieredCache("place", local, shared, ModelSerializer(PLACE_CACHE_MODELS))
+
+
+place_cache = create_place_cache()
+
+
+def invalidate_places(place_ids: Optional[Iterable[int]] = None) -> None:
+    if place_ids is None:
+        place_cache.clear()
+        return
+    place_cache.delete(
+        f"{kind}:{place_id}"
+        for place_id in place_ids
+        for kind in PLACE_CACHE_MODELS
+    )
@@ -0,0 +1,75 @@
+import itertools
+import logging
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app.models.places import Place
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_place_ids(db: Session, tafp_df: pd.DataFrame) -> pd.DataFrame:
+    place_ids = {}
+    for place_id, name in db.query(Place.id, Place.name).order_by(Place.id).all():
+        place_ids.setdefault(name.lower(), place_id)
+
+    resolved = tafp_df.assign(
+        place_id=tafp_df["name"].map(lambda name: place_ids.get(str(name).lower())).astype("Int64")
+    )
+
+    unmatched = resolved.loc[resolved["place_id"].isna(), "name"].unique().tolist()
+    if unmatched:
+        logger.warning(
+            "%d tafp place names did not match any place: %s",
+            len(unmatched), ", ".join(map(str, unmatched[:20]))
+        )
+    return resolved
+
+
+class ClusterRecommendTable:
+    """
+    Precomputed k-modes recommendations: the cluster of every known
+    (isWeekend, season, sex, age_group) tuple and the ranked place ids of every
+    cluster. Expects `tafp_df` to have gone through `resolve_place_ids`.
+    """
+
+    def __init__(self, model, tafp_df: pd.DataFrame, top_n: int = 10):
+        self.model = model
+        self.top_n = top_n
+        self._lock = threading.Lock()
+
+        ranked = (
+            tafp_df.assign(cluster=np.asarray(model.labels_))
+            .sort_values("pop", ascending=False, kind="stable")
+        )
+        self.places_by_cluster: Dict[int, List[int]] = {
+            int(cluster): (
+                group.drop_duplicates("name").head(top_n)["place_id"].dropna().astype(int).tolist()
+            )
+            for cluster, group in ranked.groupby("cluster", sort=False)
+        }
+
+        age_groups = sorted(tafp_df["age"].dropna().unique().tolist()) if "age" in tafp_df else []
+        features = list(itertools.product([0, 1], range(4), [0, 1], age_groups))
+        self.cluster_by_features: Dict[Tuple, int] = {}
+        if features:
+            clusters = model.predict(np.array(features))
+            self.cluster_by_features = {
+                tuple(feature): int(cluster) for feature, cluster in zip(features, clusters)
+            }
+
+    def cluster(self, features: Sequence) -> int:
+        key = tuple(features)
+        cluster = self.cluster_by_features.get(key)
+        if cluster is None:
+            cluster = int(self.model.predict([list(features)])[0])
+            with self._lock:
+                self.cluster_by_features[key] = cluster
+        return cluster
+
+    def recommend(self, features: Sequence) -> List[int]:
+        return self.places_by_cluster.get(self.cluster(features), [])
@@ -0,0 +1,238 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.places import Place
+
+logger = logging.getLogger(__name__)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def embedding_layers(model) -> Dict[int, dict]:
+    """
+    The Embedding layers of the CF model by input (0 = user, 1 = place) and kind
+    ("embedding", or "bias" for one-dimensional ones). Layers that cannot be
+    traced to an input are assigned by position: user, place, user, place.
+    """
+    embeddings = [layer for layer in model.layers if layer.__class__.__name__ == "Embedding"]
+    input_names = [getattr(tensor, "name", "").split(":")[0] for tensor in model.inputs]
+
+    def input_index(layer):
+        try:
+            name = layer.input.name.split(":")[0]
+        except (AttributeError, ValueError):
+            return None
+        return input_names.index(name) if name in input_names else None
+
+    layers = {0: {}, 1: {}}
+    for position, layer in enumerate(embeddings):
+        index = input_index(layer)
+        if index is None:
+            index = 0 if position % 2 == 0 else 1
+        if index not in layers:
+            continue
+        output_dim = getattr(layer, "output_dim", None) or layer.get_weights()[0].shape[1]
+        layers[index]["bias" if output_dim == 1 else "embedding"] = layer
+    return layers
+
+
+def place_vocabulary_size(model) -> Optional[int]:
+    """
+    Rows of the model's place Embedding layers; larger place ids would fail in
+    `model.predict`.
+    """
+    sizes = [
+        getattr(layer, "input_dim", None) or layer.get_weights()[0].shape[0]
+        for layer in embedding_layers(model)[1].values()
+    ]
+    return min(sizes) if sizes else None
+
+
+class EmbeddingScorer:
+    """
+    Scores places for a user as the dot product of the user and place embeddings
+    of the collaborative filtering model (plus bias embeddings when present).
+    Only used when `validate` shows it ranks places the same way as the model.
+    """
+
+    def __init__(
+        self,
+        user_embeddings: np.ndarray,
+        place_embeddings: np.ndarray,
+        user_bias: Optional[np.ndarray] = None,
+        place_bias: Optional[np.ndarray] = None,
+    ):
+        self.user_embeddings = user_embeddings.astype(np.float32)
+        self.place_embeddings = place_embeddings.astype(np.float32)
+        self.user_bias = None if user_bias is None else user_bias.astype(np.float32).ravel()
+        self.place_bias = None if place_bias is None else place_bias.astype(np.float32).ravel()
+        self.validation = {}
+
+    @classmethod
+    def from_model(cls, model) -> Optional["EmbeddingScorer"]:
+        weights = {
+            index: {kind: layer.get_weights()[0] for kind, layer in layers.items()}
+            for index, layers in embedding_layers(model).items()
+        }
+
+        if "embedding" not in weights[0] or "embedding" not in weights[1]:
+            return None
+        if weights[0]["embedding"].shape[1] != weights[1]["embedding"].shape[1]:
+            return None
+
+        return cls(
+            weights[0]["embedding"],
+            weights[1]["embedding"],
+            weights[0].get("bias"),
+            weights[1].get("bias"),
+        )
+
+    def can_score(self, user_id: int, place_ids: np.ndarray) -> bool:
+        return (
+            0 <= user_id < len(self.user_embeddings)
+            and len(place_ids) > 0
+            and place_ids.max() < len(self.place_embeddings)
+        )
+
+    def scores(self, user_id: int, place_ids: np.ndarray) -> np.ndarray:
+        scores = self.place_embeddings[place_ids] @ self.user_embeddings[user_id]
+        if self.place_bias is not None:
+            scores += self.place_bias[place_ids]
+        if self.user_bias is not None:
+            scores += self.user_bias[user_id]
+        return scores
+
+    def validate(self, model, place_ids: np.ndarray, sample_users: int = 3, k: int = 20) -> bool:
+        if not self.can_score(0, place_ids):
+            return False
+
+        rng = np.random.default_rng(0)
+        user_ids = rng.choice(
+            len(self.user_embeddings),
+            size=min(sample_users, len(self.user_embeddings)),
+            replace=False
+        )
+
+        predict_seconds, scorer_seconds = 0.0, 0.0
+        for user_id in user_ids.tolist():
+            for visit_count in (np.zeros(len(place_ids)), rng.integers(0, 5, len(place_ids))):
+                started = time.perf_counter()
+                expected = model.predict(
+                    [np.full(len(place_ids), user_id), place_ids, visit_count],
+                    batch_size=8192,
+                    verbose=0
+                ).ravel()
+                predict_seconds += time.perf_counter() - started
+
+                started = time.perf_counter()
+                actual = self.scores(user_id, place_ids)
+                scorer_seconds += time.perf_counter() - started
+
+                if set(top_k_indices(expected, k).tolist()) != set(top_k_indices(actual, k).tolist()):
+                    logger.warning("Embedding scorer disagrees with the CF model for user %s", user_id)
+                    return False
+
+        runs = len(user_ids) * 2
+        self.validation = {
+            "predict_ms": predict_seconds / runs * 1000,
+            "scorer_ms": scorer_seconds / runs * 1000,
+        }
+        logger.info(
+            "Embedding scorer validated: %.2f ms per user vs %.2f ms for model.predict",
+            self.validation["scorer_ms"], self.validation["predict_ms"]
+        )
+        return True
+
+
+class PlaceUniverse:
+    """
+    The places the CF model can score: existing place ids that fall inside the
+    model's place vocabulary, with the model index used for each of them.
+    Also keeps a small LRU of score vectors. `refresh` re-reads the places, so
+    places added after the bundle was built are scored without a model reload.
+    """
+
+    def __init__(self, vocabulary_size: Optional[int] = None, cache_size: int = 128):
+        self.vocabulary_size = vocabulary_size
+        self.cache_size = cache_size
+        self.place_ids = np.empty(0, dtype=np.int32)
+        self.model_indices = np.empty(0, dtype=np.int32)
+        self.unscorable = 0
+        self._scores: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_db(cls, db: Session, vocabulary_size: Optional[int] = None) -> "PlaceUniverse":
+        universe = cls(vocabulary_size)
+        universe.refresh(db)
+        return universe
+
+    def refresh(self, db: Session) -> None:
+        place_ids = np.array(
+            [row[0] for row in db.query(Place.id).order_by(Place.id).all()],
+            dtype=np.int32
+        )
+        scorable = place_ids >= 0
+        if self.vocabulary_size is not None:
+            scorable &= place_ids < self.vocabulary_size
+
+        if not scorable.all():
+            logger.warning("%d places are outside the CF model vocabulary", int((~scorable).sum()))
+
+        with self._lock:
+            self.place_ids = place_ids[scorable]
+            self.model_indices = self.place_ids.copy()
+            self.unscorable = int((~scorable).sum())
+            self._scores.clear()
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The place ids and model indices of the same refresh. Score vectors are
+        only cached and returned for the `place_ids` of the latest one.
+        """
+        with self._lock:
+            return self.place_ids, self.model_indices
+
+    def __len__(self) -> int:
+        return len(self.place_ids)
+
+    def visit_counts(self, visited_places: Dict[int, int], place_ids: Optional[np.ndarray] = None) -> np.ndarray:
+        place_ids = self.place_ids if place_ids is None else place_ids
+        visit_count = np.zeros(len(place_ids), dtype=np.int64)
+        if visited_places:
+            visited_ids = np.fromiter(visited_places.keys(), dtype=np.int64)
+            counts = np.fromiter(visited_places.values(), dtype=np.int64)
+            positions = np.clip(np.searchsorted(place_ids, visited_ids), 0, max(len(place_ids) - 1, 0))
+            known = (len(place_ids) > 0) & (place_ids[positions] == visited_ids)
+            visit_count[positions[known]] = counts[known]
+        return visit_count
+
+    def cached_scores(self, key: Hashable, place_ids: np.ndarray) -> Optional[np.ndarray]:
+        with self._lock:
+            if place_ids is not self.place_ids:
+                return None
+            scores = self._scores.get(key)
+            if scores is not None:
+                self._scores.move_to_end(key)
+            return scores
+
+    def store_scores(self, key: Hashable, place_ids: np.ndarray, scores: np.ndarray) -> None:
+        with self._lock:
+            if place_ids is not self.place_ids:
+                return
+            self._scores[key] = scores
+            self._scores.move_to_end(key)
+            while len(self._scores) > self.cache_size:
+                self._scores.popitem(last=False)
@@ -0,0 +1,114 @@
+import threading
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.places import Place, NaverPlace, KakaoPlace, PlaceRanking
+from app.utils.spatial import haversine
+
+
+class PlaceFeatures:
+    """
+    Every place with a ranking score as NumPy arrays: coordinates and a mask per
+    Naver/Kakao subcategory id. Rows are kept in recommendation order (score,
+    review count, place id, all descending), so masking the arrays preserves
+    the ranking.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = (
+            np.empty(0, dtype=np.int64),
+            np.empty(0, dtype=np.float64),
+            np.empty(0, dtype=np.float64),
+            {},
+        )
+
+    @classmethod
+    def from_db(cls, db: Session) -> "PlaceFeatures":
+        features = cls()
+        features.refresh(db)
+        return features
+
+    def __len__(self) -> int:
+        return len(self._state[0])
+
+    def refresh(self, db: Session) -> None:
+        rows = (
+            db.query(PlaceRanking.place_id, Place.pos_x, Place.pos_y)
+            .join(Place, Place.id == PlaceRanking.place_id)
+            .filter(PlaceRanking.score.isnot(None))
+            .order_by(
+                PlaceRanking.score.desc(),
+                PlaceRanking.review_count.desc(),
+                PlaceRanking.place_id.desc()
+            )
+            .all()
+        )
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        lats = np.array([row[1] for row in rows], dtype=np.float64)
+        lons = np.array([row[2] for row in rows], dtype=np.float64)
+
+        subcategories = (
+            db.query(NaverPlace.place_id, NaverPlace.subcategory_id)
+            .filter(NaverPlace.subcategory_id.isnot(None))
+            .union_all(
+                db.query(KakaoPlace.place_id, KakaoPlace.subcategory_id)
+                .filter(KakaoPlace.subcategory_id.isnot(None))
+            )
+            .all()
+        )
+        place_ids = np.array([row[0] for row in subcategories], dtype=np.int64)
+        codes = np.array([row[1] for row in subcategories], dtype=np.int64)
+
+        if len(ids) and len(place_ids):
+            order = np.argsort(ids)
+            positions = order[np.minimum(np.searchsorted(ids, place_ids, sorter=order), len(ids) - 1)]
+            known = ids[positions] == place_ids
+            positions, codes = positions[known], codes[known]
+        else:
+            positions, codes = place_ids[:0], codes[:0]
+
+        masks: Dict[int, np.ndarray] = {}
+        for code in np.unique(codes).tolist():
+            mask = np.zeros(len(ids), dtype=bool)
+            mask[positions[codes == code]] = True
+            masks[code] = mask
+
+        with self._lock:
+            self._state = (ids, lats, lons, masks)
+
+    def recommend(
+        self,
+        lat: float,
+        lon: float,
+        visited: Iterable[int],
+        quotas: Sequence[Tuple[Sequence[int], int]],
+        radius_km: float = 10.0,
+        fallback: int = 10,
+    ) -> List[int]:
+        """
+        For each (subcategory ids, count) in `quotas`, in order, the best `count`
+        places in any of those subcategories within `radius_km`. When that selects
+        nothing, the best `fallback` places regardless of category and distance.
+        Places in `visited` are never selected.
+        """
+        ids, lats, lons, masks = self._state
+        candidates = ~np.isin(ids, np.fromiter(visited, dtype=np.int64))
+
+        selected: List[int] = []
+        if quotas:
+            nearby = candidates & (haversine(lat, lon, lats, lons) < radius_km)
+            for subcategory_ids, count in quotas:
+                if count <= 0:
+                    continue
+                in_subcategories = np.zeros(len(ids), dtype=bool)
+                for subcategory_id in subcategory_ids:
+                    if subcategory_id in masks:
+                        in_subcategories |= masks[subcategory_id]
+                selected.extend(ids[np.flatnonzero(nearby & in_subcategories)[:count]].tolist())
+
+        if not selected:
+            selected = ids[candidates][:fallback].tolist()
+        return selected
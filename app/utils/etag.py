@@ -0,0 +1,28 @@
+import hashlib
+from typing import Optional, Sequence
+
+from fastapi import Request, Response
+
+
+def make_etag(version: Sequence) -> str:
+    digest = hashlib.sha1(repr(tuple(version)).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def not_modified(request: Request, response: Response, version: Sequence) -> Optional[Response]:
+    """
+    Sets the ETag for `version` on `response` and returns a 304 response when the
+    request's If-None-Match already carries it, before any body is built.
+    """
+    etag = make_etag((request.url.path, request.url.query, *version))
+    response.headers["ETag"] = etag
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
@@ -0,0 +1,172 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceUnavailable(Exception):
+    pass
+
+
+class InferenceQueueFull(InferenceUnavailable):
+    pass
+
+
+class InferenceTimeout(InferenceUnavailable):
+    pass
+
+
+class BatchingPredictor:
+    """
+    Runs `model.predict` on a dedicated thread, merging the requests that arrive
+    within `max_wait` seconds into one batched call.
+    """
+
+    def __init__(
+        self,
+        model,
+        max_batch_size: int = 8,
+        max_wait: float = 0.005,
+        max_queue_size: int = 64,
+        predict_batch_size: int = 8192,
+        timeout: float = 30.0,
+    ):
+        self.model = model
+        self.timeout = timeout
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.predict_batch_size = predict_batch_size
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "rejected": 0,
+            "timeouts": 0,
+            "errors": 0,
+            "batches": 0,
+            "batched_requests": 0,
+            "last_batch_size": 0,
+            "max_batch_size": 0,
+            "predict_seconds": 0.0,
+        }
+        self._batch_sizes: Dict[int, int] = {}
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name="inference-executor", daemon=True)
+        self._thread.start()
+
+    def predict(self, inputs: List[np.ndarray], timeout: Optional[float] = None) -> np.ndarray:
+        """
+        Waits at most `timeout` seconds (the predictor's default when None) and
+        raises InferenceTimeout after that.
+        """
+        if self._closed:
+            raise InferenceQueueFull("Inference executor is closed")
+
+        future: Future = Future()
+        try:
+            self._queue.put_nowait(([np.asarray(x) for x in inputs], future))
+        except queue.Full:
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise InferenceQueueFull("Inference queue is full")
+
+        with self._lock:
+            self._stats["requests"] += 1
+        try:
+            return future.result(self.timeout if timeout is None else timeout)
+        except TimeoutError:
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise InferenceTimeout("Inference timed out")
+
+    def close(self) -> None:
+        self._closed = True
+        # The executor keeps draining the queue, so a full queue frees up; stop
+        # trying once the thread is gone.
+        while self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self._thread.join()
+
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[1].set_exception(InferenceQueueFull("Inference executor is closed"))
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["batch_sizes"] = dict(sorted(self._batch_sizes.items()))
+        stats["queue_depth"] = self._queue.qsize()
+        return stats
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch, stop = [item], False
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            try:
+                self._predict_batch(batch)
+            except Exception as e:
+                logger.exception("Inference batch failed")
+                with self._lock:
+                    self._stats["errors"] += 1
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            if stop:
+                return
+
+    def _predict_batch(self, batch) -> None:
+        sizes = [len(inputs[0]) for inputs, _ in batch]
+        merged = [
+            np.concatenate([inputs[i] for inputs, _ in batch])
+            for i in range(len(batch[0][0]))
+        ]
+
+        started = time.perf_counter()
+        outputs = self.model.predict(merged, batch_size=self.predict_batch_size, verbose=0)
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["batched_requests"] += len(batch)
+            self._stats["last_batch_size"] = len(batch)
+            self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(batch))
+            self._stats["predict_seconds"] += elapsed
+            self._batch_sizes[len(batch)] = self._batch_sizes.get(len(batch), 0) + 1
+
+        offsets = np.cumsum([0] + sizes)
+        for (_, future), start, end in zip(batch, offsets[:-1], offsets[1:]):
+            future.set_result(outputs[start:end])
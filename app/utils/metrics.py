@@ -0,0 +1,219 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "pool_wait_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def start_request() -> RequestStats:
+    # Handlers run on the threadpool with a copy of this context, so they see the
+    # same RequestStats object and add to it.
+    stats = RequestStats()
+    _request_stats.set(stats)
+    return stats
+
+
+def current_request() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def format_labels(labels: Dict[str, object]) -> str:
+    if not labels:
+        return ""
+    values = ",".join(
+        '{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels.items()
+    )
+    return "{" + values + "}"
+
+
+def render_histogram(name: str, labels: Dict[str, object], histogram: Histogram) -> List[str]:
+    lines, cumulative = [], 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        lines.append(f"{name}_bucket{format_labels({**labels, 'le': bound})} {cumulative}")
+    lines.append(f"{name}_bucket{format_labels({**labels, 'le': '+Inf'})} {histogram.count}")
+    lines.append(f"{name}_sum{format_labels(labels)} {histogram.sum}")
+    lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+    return lines
+
+
+def render_stats(prefix: str, stats: dict, labels: Optional[Dict[str, object]] = None) -> List[str]:
+    """
+    Renders the numeric values of a stats dict (like `BatchingPredictor.stats()`)
+    as gauges. Nested dicts with scalar keys become a labelled series.
+    """
+    labels = labels or {}
+    lines = []
+    for key, value in stats.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, bool):
+            lines.append(f"{name}{format_labels(labels)} {int(value)}")
+        elif isinstance(value, (int, float)):
+            lines.append(f"{name}{format_labels(labels)} {value}")
+        elif isinstance(value, dict) and all(isinstance(v, (int, float)) for v in value.values()):
+            lines.extend(
+                f"{name}{format_labels({**labels, 'key': k})} {v}" for k, v in value.items()
+            )
+    return lines
+
+
+class Metrics:
+    """
+    Process-wide request and database metrics, collected from SQLAlchemy engine
+    events and the HTTP middleware, rendered in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency: Dict[Tuple[str, str, int], Histogram] = {}
+        self._queries: Dict[Tuple[str, str], Histogram] = {}
+        self._db_seconds: Dict[Tuple[str, str], float] = {}
+        self._pool_wait = Histogram(POOL_WAIT_BUCKETS)
+        self._totals = {"queries": 0, "db_seconds": 0.0, "checkouts": 0, "checkins": 0}
+        self._engine: Optional[Engine] = None
+
+    def instrument(self, engine: Engine) -> None:
+        self._engine = engine
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+        event.listen(engine.pool, "checkout", self._checkout)
+        event.listen(engine.pool, "checkin", self._checkin)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self._record_query(conn)
+
+    def _handle_error(self, context):
+        if context.connection is not None and context.connection.info.get("query_started"):
+            self._record_query(context.connection)
+
+    def _record_query(self, conn) -> None:
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        stats = current_request()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+        with self._lock:
+            self._totals["queries"] += 1
+            self._totals["db_seconds"] += elapsed
+
+    def _checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self._totals["checkouts"] += 1
+
+    def _checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self._totals["checkins"] += 1
+
+    def observe_pool_wait(self, seconds: float) -> None:
+        stats = current_request()
+        if stats is not None:
+            stats.pool_wait_seconds += seconds
+        with self._lock:
+            self._pool_wait.observe(seconds)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        with self._lock:
+            self._latency.setdefault((method, route, status), Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self._queries.setdefault((method, route), Histogram(QUERY_COUNT_BUCKETS)).observe(stats.queries)
+            self._db_seconds[(method, route)] = self._db_seconds.get((method, route), 0.0) + stats.db_seconds
+
+    def pool_stats(self) -> dict:
+        pool = self._engine.pool if self._engine is not None else None
+        stats = {}
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            if pool is not None and hasattr(pool, name):
+                stats[name] = getattr(pool, name)()
+        return stats
+
+    def render(self, extra: Iterable[str] = ()) -> str:
+        with self._lock:
+            lines = [
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (method, route, status), histogram in sorted(self._latency.items()):
+                lines.extend(render_histogram(
+                    "http_request_duration_seconds",
+                    {"method": method, "route": route, "status": status},
+                    histogram
+                ))
+
+            lines.append("# TYPE http_request_db_queries histogram")
+            for (method, route), histogram in sorted(self._queries.items()):
+                lines.extend(render_histogram(
+                    "http_request_db_queries", {"method": method, "route": route}, histogram
+                ))
+
+            lines.append("# TYPE http_request_db_seconds_total counter")
+            for (method, route), seconds in sorted(self._db_seconds.items()):
+                lines.append(f"http_request_db_seconds_total{format_labels({'method': method, 'route': route})} {seconds}")
+
+            lines.append("# TYPE db_pool_wait_seconds histogram")
+            lines.extend(render_histogram("db_pool_wait_seconds", {}, self._pool_wait))
+
+            lines.append("# TYPE db_queries_total counter")
+            lines.append(f"db_queries_total {self._totals['queries']}")
+            lines.append("# TYPE db_query_seconds_total counter")
+            lines.append(f"db_query_seconds_total {self._totals['db_seconds']}")
+            lines.append("# TYPE db_pool_checkouts_total counter")
+            lines.append(f"db_pool_checkouts_total {self._totals['checkouts']}")
+            lines.append("# TYPE db_pool_checkins_total counter")
+            lines.append(f"db_pool_checkins_total {self._totals['checkins']}")
+
+        lines.extend(render_stats("db_pool", self.pool_stats()))
+        lines.extend(extra)
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout takes: the wait for a free
+    connection, plus opening a new one when the pool grows.
+    """
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            metrics.observe_pool_wait(time.perf_counter() - started)
@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ModelBundle:
+    version: str
+    c_model: Any
+    cf_model: Any
+    tafp_df: Any
+    cluster_table: Any
+    cf_predictor: Any
+    cf_scorer: Any
+    cf_universe: Any
+    timings: dict = field(default_factory=dict)
+    loaded_at: float = field(default_factory=time.time)
+
+    def warmup(self) -> None:
+        place_ids = self.cf_universe.model_indices[:16]
+        if len(place_ids):
+            self.cf_predictor.predict([
+                np.ones(len(place_ids), dtype=np.int64),
+                place_ids,
+                np.zeros(len(place_ids), dtype=np.int64),
+            ])
+        if self.cf_scorer is not None and len(place_ids):
+            self.cf_scorer.scores(0, place_ids)
+        if self.cluster_table.cluster_by_features:
+            self.cluster_table.recommend(next(iter(self.cluster_table.cluster_by_features)))
+
+    def close(self) -> None:
+        self.cf_predictor.close()
+
+
+class ModelLoadInProgress(RuntimeError):
+    pass
+
+
+class ModelRegistry:
+    """
+    Holds the active model bundle. New versions are built and warmed up off the
+    request path and then swapped in with a single assignment, so a request
+    always sees one complete bundle. Only one version is loaded at a time.
+    """
+
+    def __init__(self, build: Callable[[str], ModelBundle], retire_after: float = 60.0, history_size: int = 50):
+        self._build = build
+        self.retire_after = retire_after
+        self._lock = threading.Lock()
+        self._active: Optional[ModelBundle] = None
+        self._loading: Optional[str] = None
+        self.history: Deque[dict] = deque(maxlen=history_size)
+
+    @property
+    def active(self) -> Optional[ModelBundle]:
+        return self._active
+
+    @property
+    def loading(self) -> Optional[str]:
+        return self._loading
+
+    def load(self, version: str) -> ModelBundle:
+        """
+        Builds and activates `version` on the calling thread. Raises
+        ModelLoadInProgress if another version is loading.
+        """
+        if not self._claim(version):
+            raise ModelLoadInProgress(f"model version {self._loading} is already loading")
+        try:
+            return self._load(version)
+        finally:
+            self._release()
+
+    def _claim(self, version: str) -> bool:
+        with self._lock:
+            if self._loading is not None:
+                return False
+            self._loading = version
+            return True
+
+    def _release(self) -> None:
+        with self._lock:
+            self._loading = None
+
+    def _load(self, version: str) -> ModelBundle:
+        started = time.perf_counter()
+        try:
+            bundle = self._build(version)
+            warmup_started = time.perf_counter()
+            bundle.warmup()
+            bundle.timings["warmup"] = {"load_ms": round((time.perf_counter() - warmup_started) * 1000, 1)}
+        except Exception as e:
+            logger.exception("Failed to load model version %s", version)
+            self.history.append({"version": version, "status": "failed", "error": repr(e)})
+            raise
+
+        bundle.timings["total"] = {"load_ms": round((time.perf_counter() - started) * 1000, 1)}
+        with self._lock:
+            previous, self._active = self._active, bundle
+        self.history.append({"version": version, "status": "active", "timings": bundle.timings})
+        logger.info("Activated model version %s: %s", version, bundle.timings)
+
+        if previous is not None:
+            retire = threading.Timer(self.retire_after, previous.close)
+            retire.daemon = True
+            retire.start()
+        return bundle
+
+    def reload(self, version: str) -> bool:
+        if not self._claim(version):
+            return False
+
+        def run():
+            try:
+                self._load(version)
+            except Exception:
+                pass
+            finally:
+                self._release()
+
+        threading.Thread(target=run, name=f"model-reload-{version}", daemon=True).start()
+        return True
+
+    def status(self) -> dict:
+        active = self._active
+        return {
+            "active_version": active.version if active else None,
+            "loaded_at": active.loaded_at if active else None,
+            "timings": active.timings if active else None,
+            "loading_version": self._loading,
+            "history": list(self.history)[-10:],
+        }
@@ -0,0 +1,130 @@
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.menus import Menu
+from app.models.places import Place
+
+
+def normalize(text: str) -> str:
+    return text.lower()
+
+
+def ngrams(text: str, n: int) -> Set[str]:
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class SearchIndex:
+    """
+    In-process inverted index over character unigrams and bigrams of place names
+    and menu items. `search` returns the same places, with the same matching
+    menus, as the `LIKE '%keyword%'` query in `crud.search`.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.places: Dict[int, str] = {}
+        self.menus: Dict[int, Tuple[int, str]] = {}
+        self.place_menus: Dict[int, List[int]] = defaultdict(list)
+        self._place_postings: Dict[str, Set[int]] = defaultdict(set)
+        self._menu_postings: Dict[str, Set[int]] = defaultdict(set)
+
+    @classmethod
+    def from_db(cls, db: Session) -> "SearchIndex":
+        index = cls()
+        index.refresh(db)
+        return index
+
+    def refresh(self, db: Session) -> None:
+        index = SearchIndex()
+        for place_id, name in db.query(Place.id, Place.name).all():
+            index.add_place(place_id, name)
+        for menu_id, place_id, menu in db.query(Menu.id, Menu.place_id, Menu.menu).order_by(Menu.id).all():
+            index.add_menu(menu_id, place_id, menu)
+
+        with self._lock:
+            self.places, self.menus, self.place_menus = index.places, index.menus, index.place_menus
+            self._place_postings, self._menu_postings = index._place_postings, index._menu_postings
+
+    @staticmethod
+    def _grams(text: str) -> Set[str]:
+        text = normalize(text)
+        return ngrams(text, 1) | ngrams(text, 2)
+
+    def add_place(self, place_id: int, name: str) -> None:
+        with self._lock:
+            if place_id in self.places:
+                self.remove_place(place_id, keep_menus=True)
+            self.places[place_id] = name
+            for gram in self._grams(name):
+                self._place_postings[gram].add(place_id)
+
+    def remove_place(self, place_id: int, keep_menus: bool = False) -> None:
+        with self._lock:
+            name = self.places.pop(place_id, None)
+            if name is None:
+                return
+            for gram in self._grams(name):
+                self._place_postings[gram].discard(place_id)
+            if not keep_menus:
+                for menu_id in list(self.place_menus.get(place_id, [])):
+                    self.remove_menu(menu_id)
+
+    def add_menu(self, menu_id: int, place_id: int, menu: str) -> None:
+        with self._lock:
+            if menu_id in self.menus:
+                self.remove_menu(menu_id)
+            self.menus[menu_id] = (place_id, menu)
+            self.place_menus[place_id].append(menu_id)
+            for gram in self._grams(menu):
+                self._menu_postings[gram].add(menu_id)
+
+    def remove_menu(self, menu_id: int) -> None:
+        with self._lock:
+            entry = self.menus.pop(menu_id, None)
+            if entry is None:
+                return
+            place_id, menu = entry
+            self.place_menus[place_id].remove(menu_id)
+            for gram in self._grams(menu):
+                self._menu_postings[gram].discard(menu_id)
+
+    def _lookup(self, postings: Dict[str, Set[int]], keyword: str, universe) -> Set[int]:
+        if not keyword:
+            return set(universe)
+
+        grams = ngrams(keyword, 2) if len(keyword) > 1 else {keyword}
+        candidates: Optional[Set[int]] = None
+        for gram in sorted(grams, key=lambda gram: len(postings.get(gram, ()))):
+            matches = postings.get(gram)
+            if not matches:
+                return set()
+            candidates = set(matches) if candidates is None else candidates & matches
+            if not candidates:
+                return set()
+        return candidates
+
+    def search(self, keyword: str) -> List[Tuple[int, str, List[str]]]:
+        keyword = normalize(keyword)
+        with self._lock:
+            matched_places = {
+                place_id for place_id in self._lookup(self._place_postings, keyword, self.places)
+                if keyword in normalize(self.places[place_id])
+            }
+            matched_menus = defaultdict(list)
+            for menu_id in sorted(self._lookup(self._menu_postings, keyword, self.menus)):
+                place_id, menu = self.menus[menu_id]
+                if keyword in normalize(menu) and place_id in self.places:
+                    matched_menus[place_id].append(menu)
+
+            def rank(place_id):
+                if place_id in matched_places:
+                    return 0, normalize(self.places[place_id]).find(keyword), place_id
+                return 1, min(normalize(menu).find(keyword) for menu in matched_menus[place_id]), place_id
+
+            return [
+                (place_id, self.places[place_id], matched_menus.get(place_id, []))
+                for place_id in sorted(matched_places | matched_menus.keys(), key=rank)
+            ]
@@ -0,0 +1,168 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.utils.metrics import LATENCY_BUCKETS, Histogram, render_histogram, render_stats
+
+logger = logging.getLogger(__name__)
+
+VISIT_WRITE_BEHIND = os.getenv("VISIT_WRITE_BEHIND", "0") == "1"
+VISIT_FLUSH_INTERVAL = float(os.getenv("VISIT_FLUSH_INTERVAL_MS", 1000)) / 1000
+VISIT_FLUSH_SIZE = int(os.getenv("VISIT_FLUSH_SIZE", 500))
+
+Visits = Dict[Tuple[int, int], int]
+
+
+class VisitBuffer:
+    """
+    Write-behind buffer for visit counts. Visits are summed in memory per
+    (user_id, place_id) and handed to `write` on a background thread every
+    `interval` seconds, or sooner once `max_pending` pairs are waiting. Visits
+    that have not been flushed yet are lost if the process dies.
+    """
+
+    def __init__(self, max_pending: int = 500, interval: float = 1.0):
+        self.max_pending = max_pending
+        self.interval = interval
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._pending: Dict[int, Dict[int, int]] = {}
+        self._flushing: Dict[int, Dict[int, int]] = {}
+        self._pending_pairs = 0
+        self._stats = {
+            "buffered_visits": 0,
+            "flushes": 0,
+            "flush_errors": 0,
+            "flushed_pairs": 0,
+            "dropped_pairs": 0,
+            "last_flush_seconds": 0.0,
+            "max_pending_pairs": 0,
+        }
+        self._flush_latency = Histogram(LATENCY_BUCKETS)
+        self._write: Optional[Callable[[Visits], int]] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, write: Callable[[Visits], int]) -> None:
+        """
+        `write` stores a batch of visits and returns the number of pairs it had
+        to drop, e.g. because the user or place does not exist.
+        """
+        self._write = write
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="visit-flusher", daemon=True)
+        self._thread.start()
+
+    def add(self, user_id: int, place_id: int, count: int = 1) -> None:
+        with self._lock:
+            places = self._pending.setdefault(user_id, {})
+            if place_id not in places:
+                self._pending_pairs += 1
+            places[place_id] = places.get(place_id, 0) + count
+            self._stats["buffered_visits"] += count
+            self._stats["max_pending_pairs"] = max(self._stats["max_pending_pairs"], self._pending_pairs)
+            full = self._pending_pairs >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def pending(self, user_id: int) -> Dict[int, int]:
+        """
+        Visit counts of `user_id` that are not committed yet, including the batch
+        being written right now.
+        """
+        if not self._pending and not self._flushing:
+            return {}
+        with self._lock:
+            visits = dict(self._flushing.get(user_id, {}))
+            for place_id, count in self._pending.get(user_id, {}).items():
+                visits[place_id] = visits.get(place_id, 0) + count
+        return visits
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                self._flushing, self._pending, self._pending_pairs = self._pending, {}, 0
+                batch = {
+                    (user_id, place_id): count
+                    for user_id, places in self._flushing.items()
+                    for place_id, count in places.items()
+                }
+
+            started = time.perf_counter()
+            try:
+                dropped = self._write(batch)
+            except Exception:
+                logger.exception("Flushing %d visit pairs failed, keeping them for the next flush", len(batch))
+                with self._lock:
+                    self._restore(self._flushing)
+                    self._flushing = {}
+                    self._stats["flush_errors"] += 1
+                return 0
+            elapsed = time.perf_counter() - started
+
+            with self._lock:
+                self._flushing = {}
+                self._stats["flushes"] += 1
+                self._stats["flushed_pairs"] += len(batch)
+                self._stats["dropped_pairs"] += dropped or 0
+                self._stats["last_flush_seconds"] = elapsed
+                self._flush_latency.observe(elapsed)
+            return len(batch)
+
+    def close(self) -> None:
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+
+        self.flush()
+        with self._lock:
+            if self._pending_pairs:
+                logger.error("Dropping %d visit pairs that could not be flushed", self._pending_pairs)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending_pairs"] = self._pending_pairs
+            stats["pending_visits"] = sum(sum(places.values()) for places in self._pending.values())
+        stats["running"] = self.running
+        stats["max_pending"] = self.max_pending
+        stats["interval"] = self.interval
+        return stats
+
+    def render(self, prefix: str = "visit_buffer") -> List[str]:
+        lines = render_stats(prefix, self.stats())
+        with self._lock:
+            lines.append(f"# TYPE {prefix}_flush_duration_seconds histogram")
+            lines.extend(render_histogram(f"{prefix}_flush_duration_seconds", {}, self._flush_latency))
+        return lines
+
+    def _restore(self, visits: Dict[int, Dict[int, int]]) -> None:
+        for user_id, places in visits.items():
+            pending = self._pending.setdefault(user_id, {})
+            for place_id, count in places.items():
+                if place_id not in pending:
+                    self._pending_pairs += 1
+                pending[place_id] = pending.get(place_id, 0) + count
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if not self._stopping.is_set():
+                self.flush()
+
+
+visit_buffer = VisitBuffer(max_pending=VISIT_FLUSH_SIZE, interval=VISIT_FLUSH_INTERVAL)
@@ -0,0 +1,166 @@
+"""
+Times the crud layer against a database seeded with synthetic data.
+
+    python -m benchmarks.crud --db sqlite:///benchmarks/bench.db --out benchmarks/results/crud.json
+    python -m benchmarks.crud --reuse --baseline benchmarks/results/crud.json
+
+The database is (re)seeded on every run unless --reuse is given and it already
+holds places. Pass --baseline to compare the p50 of every case with an earlier
+results file; the exit status is 1 when a case regressed past --threshold.
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Callable, Dict
+
+from benchmarks.report import compare, environment, percentile, print_table, read_results, write_results
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_URL = f"sqlite:///{os.path.join(BENCHMARK_DIR, 'bench.db')}"
+DEFAULT_OUT = os.path.join(BENCHMARK_DIR, "results", "crud.json")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=os.getenv("BENCHMARK_DB_URL", DEFAULT_DB_URL))
+    parser.add_argument("--places", type=int, default=23000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reuse", action="store_true", help="reuse an already seeded database")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--only", nargs="*", help="run only the cases whose name starts with one of these")
+    parser.add_argument("--out", default=DEFAULT_OUT)
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    return parser.parse_args(argv)
+
+
+def run_case(session_factory, case: Callable, repeat: int, warmup: int, before: Callable = None) -> dict:
+    from app.utils.metrics import start_request
+
+    timings, queries, rows = [], [], 0
+    for iteration in range(warmup + repeat):
+        if before is not None:
+            before()
+        with session_factory() as db:
+            stats = start_request()
+            started = time.perf_counter()
+            result = case(db)
+            elapsed = time.perf_counter() - started
+        if iteration < warmup:
+            continue
+        timings.append(elapsed * 1000)
+        queries.append(stats.queries)
+        rows = len(result[0] if isinstance(result, tuple) else result or [])
+
+    return {
+        "runs": repeat,
+        "min_ms": round(min(timings), 3),
+        "mean_ms": round(sum(timings) / len(timings), 3),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "max_ms": round(max(timings), 3),
+        "queries": max(queries),
+        "rows": rows,
+    }
+
+
+def build_cases(engine, args) -> Dict[str, tuple]:
+    from app.crud import places, reviews, search, visitedplaces
+    from app.database import SessionLocal
+    from app.schemas.places import CollaborativeBasedRecommendRequest, ContentBasedRecommedRequest
+    from app.utils.cache import place_cache
+    from app.utils.content import PlaceFeatures
+    from app.utils.search_index import SearchIndex
+    from benchmarks.seed import CENTER_LATITUDE, CENTER_LONGITUDE, heaviest_users, most_reviewed_place
+    from benchmarks.stubs import stub_bundle
+
+    with SessionLocal() as db:
+        place_features = PlaceFeatures.from_db(db)
+        search_index = SearchIndex.from_db(db)
+        bundle = stub_bundle(db, args.users, args.places)
+        predict_bundle = stub_bundle(db, args.users, args.places, visit_weight=0.05, version="stub-predict")
+
+    heavy_user, = heaviest_users(engine)
+    light_user = args.users
+    payload = dict(user_id=heavy_user, latitude=CENTER_LATITUDE, longitude=CENTER_LONGITUDE, top_n=10)
+    content_payload = ContentBasedRecommedRequest(**payload)
+    collaborative_payload = CollaborativeBasedRecommendRequest(**payload)
+    popular_place = most_reviewed_place(engine)
+
+    cold = place_cache.clear
+    cases = {
+        "get_places.name": (lambda db: places.get_places(db, "name", "desc", 0, 10), cold),
+        "get_places.score": (lambda db: places.get_places(db, "score", "desc", 0, 10), cold),
+        "get_places.review_count": (lambda db: places.get_places(db, "review_count", "desc", 0, 10), cold),
+        "get_places.score.deep_offset": (lambda db: places.get_places(db, "score", "desc", 10000, 10), cold),
+        "get_places_after.score": (lambda db: places.get_places_after(db, "score", "desc", None, 10), cold),
+        "get_place_by_id": (lambda db: [places.get_place_by_id(db, popular_place)], cold),
+        "get_place_by_id.cached": (lambda db: [places.get_place_by_id(db, popular_place)], None),
+        "get_review_by_id": (lambda db: reviews.get_review_by_id(db, popular_place, None, 50), None),
+        "search_keyword.sql": (lambda db: search.search_keyword(db, "커피", 0, 50), None),
+        "search_keyword.index": (lambda db: search.search_keyword(db, "커피", 0, 50, search_index), None),
+        "search_keyword.sql.menu": (lambda db: search.search_keyword(db, "김밥", 0, 50), None),
+        "search_keyword.index.menu": (lambda db: search.search_keyword(db, "김밥", 0, 50, search_index), None),
+        "get_visited_place_by_user.heavy": (lambda db: visitedplaces.get_visited_place_by_user(db, heavy_user), cold),
+        "get_visited_place_by_user.light": (lambda db: visitedplaces.get_visited_place_by_user(db, light_user), cold),
+        "get_content_based_recommend": (
+            lambda db: places.get_content_based_recommend(db, "all", content_payload, place_features), cold
+        ),
+        "get_cluster_based_recommend": (
+            lambda db: places.get_cluster_based_recommend(db, bundle.cluster_table, heavy_user), cold
+        ),
+        "get_collaborative_based_recommend.scorer": (
+            lambda db: places.get_collaborative_based_recommend(
+                db, bundle.cf_predictor, "all", collaborative_payload, bundle.cf_scorer, bundle.cf_universe
+            ), cold
+        ),
+        "get_collaborative_based_recommend.predict": (
+            lambda db: places.get_collaborative_based_recommend(
+                db, predict_bundle.cf_predictor, "all", collaborative_payload, None, predict_bundle.cf_universe
+            ), cold
+        ),
+    }
+    return cases, (bundle, predict_bundle)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    os.environ["AWS_RDS_URL"] = args.db
+
+    from app.database import SessionLocal, engine
+    from benchmarks.seed import ensure_seeded
+
+    dataset, args.places = ensure_seeded(engine, args.places, args.users, args.seed, args.reuse)
+
+    cases, bundles = build_cases(engine, args)
+    try:
+        results = {}
+        for name, (case, before) in cases.items():
+            if args.only and not any(name.startswith(prefix) for prefix in args.only):
+                continue
+            results[name] = run_case(SessionLocal, case, args.repeat, args.warmup, before)
+            print(f"{name}: {results[name]}")
+    finally:
+        for bundle in bundles:
+            bundle.close()
+
+    write_results(args.out, {
+        "environment": {**environment(), "dialect": engine.dialect.name},
+        "dataset": dataset or {"places": args.places},
+        "results": results,
+    })
+    print(f"Wrote {args.out}")
+
+    if args.baseline:
+        rows = compare(results, read_results(args.baseline)["results"], threshold=args.threshold)
+        print_table(rows, ["case", "baseline", "current", "ratio", "regressed"])
+        if any(row["regressed"] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
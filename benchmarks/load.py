@@ -0,0 +1,325 @@
+"""
+HTTP load test against the app, seeded with synthetic data and stub models.
+
+    python -m benchmarks.load --concurrency 32 --duration 30
+    python -m benchmarks.load --serve 8001 --mix places=5,search=3,visited=2
+    python -m benchmarks.load --reuse --baseline benchmarks/results/load.json
+    python -m benchmarks.load --reuse --write-behind --mix visit=1,visited=1
+
+By default requests go through httpx's ASGI transport to the app in this
+process. --serve runs the app under uvicorn on a local port instead, so the
+numbers include the HTTP server. Results per route (throughput, p50/p95/p99
+latency, error rate) are written to --out; with --baseline the p95 of every
+route is compared with an earlier run and the exit status is 1 on regression.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+from benchmarks.report import compare, environment, percentile, print_table, read_results, write_results
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_URL = f"sqlite:///{os.path.join(BENCHMARK_DIR, 'bench.db')}"
+DEFAULT_OUT = os.path.join(BENCHMARK_DIR, "results", "load.json")
+DEFAULT_MIX = "places=20,place=20,search=15,autocomplete=5,visited=15,visit=5,cluster=8,collaborative=8,content=4"
+
+
+@dataclass
+class Target:
+    route: str
+    build: Callable[[random.Random], tuple]
+
+
+def build_targets(places: int, users: int) -> Dict[str, Target]:
+    from benchmarks.seed import CENTER_LATITUDE, CENTER_LONGITUDE, MENUS
+
+    keywords = ["커피", "치킨", "김밥", "스타벅스", "신촌", "떡볶이"] + MENUS[:6]
+
+    def payload(rng):
+        return {
+            "user_id": rng.randint(1, users),
+            "latitude": CENTER_LATITUDE + rng.uniform(-0.01, 0.01),
+            "longitude": CENTER_LONGITUDE + rng.uniform(-0.01, 0.01),
+            "top_n": 10,
+        }
+
+    return {
+        "places": Target("GET /places/", lambda rng: (
+            "GET", "/places/",
+            {"sort_by": rng.choice(["name", "score", "review_count"]), "page": rng.randint(1, 20)}, None
+        )),
+        "place": Target("GET /places/{place_id}", lambda rng: (
+            "GET", f"/places/{rng.randint(1, places)}", None, None
+        )),
+        "search": Target("GET /search/{keyword}", lambda rng: (
+            "GET", f"/search/{rng.choice(keywords)}", {"page": 1}, None
+        )),
+        "autocomplete": Target("GET /search/autocomplete/{prefix}", lambda rng: (
+            "GET", f"/search/autocomplete/{rng.choice(keywords)[:1]}", None, None
+        )),
+        "visited": Target("GET /visited_places/{user_id}", lambda rng: (
+            "GET", f"/visited_places/{rng.randint(1, users)}", None, None
+        )),
+        "visit": Target("POST /visited_places/visit", lambda rng: (
+            "POST", "/visited_places/visit", None,
+            {"user_id": rng.randint(1, users), "place_id": rng.randint(1, places)}
+        )),
+        "visits": Target("POST /visited_places/visits", lambda rng: (
+            "POST", "/visited_places/visits", None,
+            {"events": [
+                {"user_id": rng.randint(1, users), "place_id": rng.randint(1, places)} for _ in range(20)
+            ]}
+        )),
+        "cluster": Target("GET /places/recommend/cluster/{user_id}", lambda rng: (
+            "GET", f"/places/recommend/cluster/{rng.randint(1, users)}", None, None
+        )),
+        "collaborative": Target("POST /places/recommend/collaborative/{category}", lambda rng: (
+            "POST", "/places/recommend/collaborative/all", None, payload(rng)
+        )),
+        "content": Target("POST /places/recommend/content/{category}", lambda rng: (
+            "POST", "/places/recommend/content/all", None, payload(rng)
+        )),
+    }
+
+
+def parse_mix(mix: str, targets: Dict[str, Target]) -> Dict[str, float]:
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in targets:
+            raise SystemExit(f"Unknown target {name!r}, expected one of {', '.join(targets)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=os.getenv("BENCHMARK_DB_URL", DEFAULT_DB_URL))
+    parser.add_argument("--places", type=int, default=23000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reuse", action="store_true", help="reuse an already seeded database")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds of unmeasured load first")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="comma separated target=weight pairs")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="run the app under uvicorn on this port")
+    parser.add_argument("--write-behind", action="store_true", help="buffer visits instead of committing each one")
+    parser.add_argument("--out", default=DEFAULT_OUT)
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    return parser.parse_args(argv)
+
+
+def prepare_app(users: int, places: int):
+    """
+    Sets up the app state the lifespan would, but with stub models instead of
+    the Hugging Face artifacts.
+    """
+    from app.database import SessionLocal, engine
+    from app.main import app, build_indexes, write_buffered_visits
+    from app.migrations import migrate
+    from app.utils.registry import ModelRegistry
+    from app.utils.visit_buffer import VISIT_WRITE_BEHIND, visit_buffer
+    from benchmarks.stubs import stub_bundle
+
+    migrate(engine)
+
+    def build(version):
+        with SessionLocal() as db:
+            return stub_bundle(db, users, places, version=version)
+
+    app.state.ready = False
+    app.state.startup_error = None
+    app.state.startup_timings = {}
+    app.state.registry = ModelRegistry(build)
+    app.state.registry.load("stub")
+    build_indexes(app, app.state.startup_timings)
+    if VISIT_WRITE_BEHIND:
+        visit_buffer.start(write_buffered_visits)
+    app.state.ready = True
+    return app
+
+
+def set_threadpool_size() -> None:
+    from anyio import to_thread
+    from app.database import DB_THREADPOOL_SIZE
+
+    to_thread.current_default_thread_limiter().total_tokens = DB_THREADPOOL_SIZE
+
+
+def serve(app, port: int):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, lifespan="off", log_level="warning"))
+
+    async def run():
+        set_threadpool_size()
+        await server.serve()
+
+    thread = threading.Thread(target=asyncio.run, args=(run(),), name="uvicorn", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise SystemExit(f"uvicorn failed to start on port {port}")
+        time.sleep(0.05)
+    return server, thread
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.db_queries: Dict[str, int] = defaultdict(int)
+
+    def record(self, route: str, seconds: float, status: str, db_queries: int = 0) -> None:
+        self.latencies[route].append(seconds * 1000)
+        self.statuses[route][status] += 1
+        self.db_queries[route] += db_queries
+
+    def summary(self, elapsed: float) -> Dict[str, dict]:
+        results = {}
+        routes = sorted(self.latencies)
+        for route in routes + ["all"]:
+            latencies = (
+                [value for values in self.latencies.values() for value in values]
+                if route == "all" else self.latencies[route]
+            )
+            statuses = defaultdict(int)
+            for name in (routes if route == "all" else [route]):
+                for status, count in self.statuses[name].items():
+                    statuses[status] += count
+            errors = sum(count for status, count in statuses.items() if status == "error" or status.startswith("5"))
+            queries = sum(self.db_queries.values()) if route == "all" else self.db_queries[route]
+            results[route] = {
+                "requests": len(latencies),
+                "throughput_rps": round(len(latencies) / elapsed, 2),
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p95_ms": round(percentile(latencies, 95), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "max_ms": round(max(latencies), 2),
+                "error_rate": round(errors / len(latencies), 4),
+                "db_queries_per_request": round(queries / len(latencies), 2),
+                "statuses": dict(sorted(statuses.items())),
+            }
+        return results
+
+
+async def run_load(client, targets, weights, concurrency, warmup, duration, seed) -> tuple:
+    names = list(weights)
+    recorder = Recorder()
+    measure_from = time.perf_counter() + warmup
+    stop_at = measure_from + duration
+
+    async def worker(worker_id: int):
+        rng = random.Random(seed * 1000 + worker_id)
+        while time.perf_counter() < stop_at:
+            target = targets[rng.choices(names, weights=[weights[name] for name in names])[0]]
+            method, url, params, body = target.build(rng)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, params=params, json=body)
+                status = str(response.status_code)
+                db_queries = int(response.headers.get("x-db-query-count", 0))
+            except Exception:
+                status, db_queries = "error", 0
+            finished = time.perf_counter()
+            if started >= measure_from and finished <= stop_at:
+                recorder.record(target.route, finished - started, status, db_queries)
+
+    await asyncio.gather(*(worker(worker_id) for worker_id in range(concurrency)))
+    return recorder, duration
+
+
+async def run(args, app) -> Dict[str, dict]:
+    import httpx
+
+    targets = build_targets(args.places, args.users)
+    weights = parse_mix(args.mix, targets)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    if args.serve:
+        client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.serve}", timeout=args.timeout, limits=limits)
+    else:
+        set_threadpool_size()
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=args.timeout
+        )
+
+    async with client:
+        recorder, elapsed = await run_load(
+            client, targets, weights, args.concurrency, args.warmup, args.duration, args.seed
+        )
+    return recorder.summary(elapsed)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    os.environ["AWS_RDS_URL"] = args.db
+    if args.write_behind:
+        os.environ["VISIT_WRITE_BEHIND"] = "1"
+
+    from app.database import engine
+    from app.utils.visit_buffer import visit_buffer
+    from benchmarks.seed import ensure_seeded
+
+    dataset, args.places = ensure_seeded(engine, args.places, args.users, args.seed, args.reuse)
+    app = prepare_app(args.users, args.places)
+
+    server = None
+    if args.serve:
+        server, thread = serve(app, args.serve)
+    try:
+        results = asyncio.run(run(args, app))
+    finally:
+        if server is not None:
+            server.should_exit = True
+            thread.join()
+        app.state.registry.active.close()
+        visit_buffer.close()
+
+    rows = [{"route": route, **{k: v for k, v in result.items() if k != "statuses"}} for route, result in results.items()]
+    print_table(rows, ["route", "requests", "throughput_rps", "p50_ms", "p95_ms", "p99_ms", "error_rate", "db_queries_per_request"])
+
+    write_results(args.out, {
+        "environment": {**environment(), "dialect": engine.dialect.name},
+        "dataset": dataset or {"places": args.places},
+        "config": {
+            "mode": f"uvicorn:{args.serve}" if args.serve else "asgi",
+            "write_behind": args.write_behind,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "mix": parse_mix(args.mix, build_targets(args.places, args.users)),
+        },
+        "results": results,
+    })
+    print(f"Wrote {args.out}")
+
+    if args.baseline:
+        baseline = read_results(args.baseline)["results"]
+        comparison = compare(results, baseline, "p95_ms", args.threshold)
+        comparison += [
+            {**row, "case": f"{row['case']} (throughput)"}
+            for row in compare(
+                {"all": results["all"]}, {"all": baseline.get("all", {})},
+                "throughput_rps", args.threshold, higher_is_better=True
+            )
+        ]
+        print_table(comparison, ["case", "baseline", "current", "ratio", "regressed"])
+        if any(row["regressed"] for row in comparison):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
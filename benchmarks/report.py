@@ -0,0 +1,87 @@
+import json
+import os
+import platform
+import subprocess
+import time
+from typing import Dict, List, Optional
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> dict:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def write_results(path: str, results: dict) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+def read_results(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(
+    results: Dict[str, dict],
+    baseline: Dict[str, dict],
+    metric: str = "p50_ms",
+    threshold: float = 1.2,
+    higher_is_better: bool = False,
+) -> List[dict]:
+    """
+    Compares `metric` for every case present in both result sets. A case regresses
+    when it is worse than the baseline by more than `threshold` times.
+    """
+    rows = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None or not previous.get(metric) or current.get(metric) is None:
+            continue
+        ratio = current[metric] / previous[metric]
+        worse = ratio < 1 / threshold if higher_is_better else ratio > threshold
+        rows.append({
+            "case": name,
+            "baseline": previous[metric],
+            "current": current[metric],
+            "ratio": round(ratio, 3),
+            "regressed": worse,
+        })
+    return rows
+
+
+def print_table(rows: List[dict], columns: List[str]) -> None:
+    widths = {
+        column: max([len(column)] + [len(str(row.get(column, ""))) for row in rows])
+        for column in columns
+    }
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print("  ".join(str(row.get(column, "")).ljust(widths[column]) for column in columns))
@@ -0,0 +1,131 @@
+"""
+Times collaborative filtering scoring for one user over every place: the
+model's forward pass with a full argsort, against the embedding dot product
+with an argpartition top-k.
+
+    python -m benchmarks.scoring --places 23000 --users 2000
+    python -m benchmarks.scoring --stub
+
+Uses a Keras model shaped like the production one when TensorFlow is
+installed and --stub is not given, otherwise the NumPy stand-in from
+benchmarks.stubs.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.report import environment, percentile, print_table, write_results
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_URL = f"sqlite:///{os.path.join(BENCHMARK_DIR, 'bench.db')}"
+DEFAULT_OUT = os.path.join(BENCHMARK_DIR, "results", "scoring.json")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--places", type=int, default=23000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--stub", action="store_true", help="use the NumPy stand-in even if TensorFlow is installed")
+    parser.add_argument("--out", default=DEFAULT_OUT)
+    return parser.parse_args(argv)
+
+
+def build_keras_model(users: int, places: int, dim: int):
+    from tensorflow import keras
+
+    user, place, visits = keras.Input((1,)), keras.Input((1,)), keras.Input((1,))
+    user_vector = keras.layers.Flatten()(keras.layers.Embedding(users, dim)(user))
+    place_vector = keras.layers.Flatten()(keras.layers.Embedding(places, dim)(place))
+    user_bias = keras.layers.Flatten()(keras.layers.Embedding(users, 1)(user))
+    place_bias = keras.layers.Flatten()(keras.layers.Embedding(places, 1)(place))
+    score = keras.layers.Add()([keras.layers.Dot(axes=1)([user_vector, place_vector]), user_bias, place_bias])
+    return keras.Model([user, place, visits], score)
+
+
+def build_model(args):
+    if not args.stub:
+        try:
+            return "keras", build_keras_model(args.users, args.places, args.dim)
+        except ImportError:
+            pass
+    from benchmarks.stubs import StubCFModel
+
+    return "stub", StubCFModel(args.users, args.places, args.dim)
+
+
+def time_case(run, repeat: int, warmup: int) -> dict:
+    timings = []
+    for iteration in range(warmup + repeat):
+        started = time.perf_counter()
+        run(iteration)
+        if iteration >= warmup:
+            timings.append((time.perf_counter() - started) * 1000)
+    return {
+        "runs": repeat,
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "max_ms": round(max(timings), 3),
+    }
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    # app.utils.collaborative imports the models, which need an engine URL; the
+    # database is never queried.
+    os.environ.setdefault("AWS_RDS_URL", DEFAULT_DB_URL)
+
+    from app.utils.collaborative import EmbeddingScorer, top_k_indices
+
+    kind, model = build_model(args)
+    scorer = EmbeddingScorer.from_model(model)
+    if scorer is None:
+        raise SystemExit("Could not extract embeddings from the model")
+
+    place_ids = np.arange(args.places)
+    visit_counts = np.zeros(args.places, dtype=np.int64)
+
+    def user_id(iteration):
+        return iteration % args.users
+
+    def predict(iteration):
+        user_ids = np.full(args.places, user_id(iteration))
+        scores = model.predict([user_ids, place_ids, visit_counts], batch_size=8192, verbose=0).ravel()
+        return np.argsort(-scores)[:20]
+
+    def score(iteration):
+        return top_k_indices(scorer.scores(user_id(iteration), place_ids), 20)
+
+    results = {
+        "model.predict+argsort": time_case(predict, args.repeat, args.warmup),
+        "scorer+argpartition": time_case(score, args.repeat, args.warmup),
+    }
+    results["scorer+argpartition"]["speedup"] = round(
+        results["model.predict+argsort"]["p50_ms"] / results["scorer+argpartition"]["p50_ms"], 1
+    )
+    results["parity"] = {"top20_equal": all(
+        set(predict(iteration).tolist()) == set(score(iteration).tolist()) for iteration in range(5)
+    )}
+
+    print_table(
+        [{"case": name, **result} for name, result in results.items() if name != "parity"],
+        ["case", "runs", "p50_ms", "p95_ms", "max_ms", "speedup"]
+    )
+    print(f"model: {kind}, top-20 parity: {results['parity']['top20_equal']}")
+
+    write_results(args.out, {
+        "environment": environment(),
+        "config": {"model": kind, "places": args.places, "users": args.users, "dim": args.dim},
+        "results": results,
+    })
+    print(f"Wrote {args.out}")
+    return 0 if results["parity"]["top20_equal"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
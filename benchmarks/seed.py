@@ -0,0 +1,247 @@
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import Index, MetaData, UniqueConstraint, func, insert, inspect
+from sqlalchemy.engine import Engine
+
+from app.database import Base, SessionLocal
+from app.models.categories import Category
+from app.models.menus import Menu
+from app.models.places import Place, NaverPlace, KakaoPlace
+from app.models.reviews import Review, PlaceReviewSummary
+from app.models.users import User
+from app.models.visitedplaces import VisitedPlace
+from app.crud.places import refresh_place_ranking
+from app.crud.reviews import refresh_review_summaries
+from app.dependencies import getCategoryName
+
+CATEGORY_IDS = [210, 220, 230, 240, 250, 260, 270, 201, 202] + list(range(101, 110)) + list(range(401, 408))
+CATEGORY_WEIGHTS = [18, 6, 6, 6, 3, 8, 4, 14, 6] + [1] * 9 + [1] * 7
+
+BRANDS = [
+    "스타벅스", "투썸플레이스", "이디야커피", "메가커피", "빽다방", "김밥천국", "본죽", "맘스터치",
+    "교촌치킨", "BBQ", "파리바게뜨", "뚜레쥬르", "서브웨이", "홍콩반점", "역전우동", "신전떡볶이",
+    "새마을식당", "한신포차", "명랑핫도그", "쉐이크쉑", "블루보틀", "카페 노티드", "을지다락", "연남살롱",
+]
+DISTRICTS = ["신촌", "홍대", "연남", "합정", "망원", "이대", "서강대", "상수", "연희", "성산"]
+MENUS = [
+    "아메리카노", "카페라떼", "바닐라라떼", "콜드브루", "김밥", "참치김밥", "떡볶이", "순대", "라면",
+    "후라이드치킨", "양념치킨", "짜장면", "짬뽕", "탕수육", "우동", "돈까스", "비빔밥", "김치찌개",
+    "된장찌개", "삼겹살", "소주", "맥주", "하이볼", "파스타", "피자", "샐러드", "케이크", "크로플",
+]
+
+# Shinchon, where the production data is centred.
+CENTER_LATITUDE, CENTER_LONGITUDE = 37.5598, 126.9425
+
+
+def create_schema(engine: Engine, reset: bool = False) -> None:
+    # `user.sex` and `user.password` are declared unique, which allows only two
+    # users. The benchmark schema drops those constraints so visits can be
+    # spread over a realistic number of users.
+    users = User.__table__.to_metadata(MetaData())
+    for column in users.columns:
+        column.unique = False
+    for constraint in [c for c in users.constraints if isinstance(c, UniqueConstraint)]:
+        users.constraints.discard(constraint)
+
+    tables = [table for table in Base.metadata.sorted_tables if table.name != "user"]
+    if reset:
+        Base.metadata.drop_all(engine, tables=tables)
+        users.drop(engine, checkfirst=True)
+    users.create(engine, checkfirst=True)
+    Base.metadata.create_all(engine, tables=tables)
+    create_foreign_key_indexes(engine)
+
+
+def create_foreign_key_indexes(engine: Engine) -> None:
+    # InnoDB indexes every foreign key column on its own; SQLite does not, which
+    # would make joins and EXISTS on place_id/user_id look far slower than in
+    # production.
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        indexed = {
+            tuple(index["column_names"][:1]) for index in inspector.get_indexes(table.name)
+        } | {tuple(inspector.get_pk_constraint(table.name)["constrained_columns"][:1])}
+        for column in table.columns:
+            if column.foreign_keys and (column.name,) not in indexed:
+                Index(f"ix_{table.name}_{column.name}_fk", column).create(engine)
+
+
+def zipf_weights(n: int, exponent: float, rng: np.random.Generator) -> np.ndarray:
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+def seed(
+    engine: Engine,
+    places: int = 23000,
+    users: int = 2000,
+    visits: int = 40000,
+    reviews: int = 30000,
+    seed: int = 0,
+    reset: bool = True,
+) -> Dict[str, int]:
+    """
+    Fills the database behind `engine` with synthetic data shaped like production:
+    most places have Naver and Kakao rows, popularity follows a Zipf curve that
+    drives review counts, reviews and visits, and a few users visit far more
+    places than the rest.
+    """
+    create_schema(engine, reset=reset)
+    rng = np.random.default_rng(seed)
+    rand = random.Random(seed)
+
+    category_of = rng.choice(CATEGORY_IDS, size=places, p=np.array(CATEGORY_WEIGHTS) / sum(CATEGORY_WEIGHTS))
+    popularity = zipf_weights(places, 1.1, rng)
+    latitudes = CENTER_LATITUDE + rng.normal(0, 0.02, places)
+    longitudes = CENTER_LONGITUDE + rng.normal(0, 0.025, places)
+
+    place_rows, naver_rows, kakao_rows, menu_rows = [], [], [], []
+    for index in range(places):
+        place_id = index + 1
+        category_id = int(category_of[index])
+        name = f"{rand.choice(BRANDS)} {rand.choice(DISTRICTS)}{place_id}호점"
+        place_rows.append({
+            "id": place_id,
+            "name": name,
+            "address": f"서울 마포구 {rand.choice(DISTRICTS)}동 {rand.randint(1, 500)}",
+            "street_address": f"서울 마포구 {rand.choice(DISTRICTS)}로 {rand.randint(1, 300)}",
+            "category_id": category_id,
+            "pos_x": float(latitudes[index]),
+            "pos_y": float(longitudes[index]),
+        })
+
+        review_count = int(popularity[index] * places * 40)
+        for rows, share in ((naver_rows, 0.85), (kakao_rows, 0.7)):
+            if rand.random() < share:
+                rows.append({
+                    "place_id": place_id,
+                    "street_address": place_rows[-1]["street_address"],
+                    "subcategory": getCategoryName(category_id),
+                    "score": None if rand.random() < 0.15 else round(rand.uniform(2.5, 5.0), 2),
+                    "review_count": max(0, int(review_count * rand.uniform(0.5, 1.5))),
+                    "subcategory_id": category_id,
+                })
+
+        for _ in range(rand.randint(0, 8)):
+            menu_rows.append({
+                "place_id": place_id,
+                "menu": rand.choice(MENUS),
+                "price": rand.randrange(2000, 40000, 500),
+            })
+
+    user_rows = [
+        {
+            "id": user_id,
+            "email": f"user{user_id}@example.com",
+            "password": f"password{user_id}",
+            "sex": bool(user_id % 2),
+            "age_group": rand.randint(1, 6),
+            "preferred_food": rand.choice(["한식", "일식", "중식", "양식"]),
+            "preferred_activity": rand.choice(["카페", "산책", "쇼핑"]),
+            "budget_range": rand.choice(["low", "medium", "high"]),
+            "preferred_atmosphere": rand.choice(["quiet", "lively"]),
+        }
+        for user_id in range(1, users + 1)
+    ]
+
+    user_activity = zipf_weights(users, 0.9, rng)
+    visit_pairs: Dict[tuple, int] = {}
+    for user_index, place_index in zip(
+        rng.choice(users, size=visits, p=user_activity),
+        rng.choice(places, size=visits, p=popularity),
+    ):
+        key = (int(user_index) + 1, int(place_index) + 1)
+        visit_pairs[key] = visit_pairs.get(key, 0) + 1
+    visit_rows = [
+        {"user_id": user_id, "place_id": place_id, "visit_count": count}
+        for (user_id, place_id), count in visit_pairs.items()
+    ]
+
+    review_rows = [
+        {
+            "place_id": int(place_index) + 1,
+            "user_id": int(user_index) + 1,
+            "comment": rand.choice(["맛있어요", "또 올게요", "분위기가 좋아요", "조금 비싸요", "친절해요"]),
+            "score": None if rand.random() < 0.1 else float(rand.randint(1, 5)),
+        }
+        for place_index, user_index in zip(
+            rng.choice(places, size=reviews, p=popularity),
+            rng.choice(users, size=reviews, p=user_activity),
+        )
+    ]
+
+    with SessionLocal(bind=engine) as db:
+        for model, rows in (
+            (Category, [{"id": category_id, "name": getCategoryName(category_id)} for category_id in CATEGORY_IDS]),
+            (Place, place_rows),
+            (NaverPlace, naver_rows),
+            (KakaoPlace, kakao_rows),
+            (Menu, menu_rows),
+            (User.__table__, user_rows),
+            (VisitedPlace, visit_rows),
+            (Review, review_rows),
+        ):
+            for start in range(0, len(rows), 5000):
+                db.execute(insert(model), rows[start:start + 5000])
+        db.commit()
+
+        refresh_place_ranking(db)
+        refresh_review_summaries(db)
+
+    return {
+        "places": len(place_rows),
+        "naver_places": len(naver_rows),
+        "kakao_places": len(kakao_rows),
+        "menus": len(menu_rows),
+        "users": len(user_rows),
+        "visited_places": len(visit_rows),
+        "reviews": len(review_rows),
+    }
+
+
+def ensure_seeded(
+    engine: Engine,
+    places: int = 23000,
+    users: int = 2000,
+    seed_value: int = 0,
+    reuse: bool = False,
+) -> Tuple[Optional[Dict[str, int]], int]:
+    create_schema(engine)
+    with SessionLocal(bind=engine) as db:
+        seeded_places = db.query(func.count(Place.id)).scalar()
+
+    if reuse and seeded_places:
+        return None, seeded_places
+
+    started = time.perf_counter()
+    dataset = seed(engine, places=places, users=users, seed=seed_value)
+    print(f"Seeded {dataset} in {time.perf_counter() - started:.1f}s")
+    return dataset, dataset["places"]
+
+
+def most_reviewed_place(engine: Engine) -> int:
+    with SessionLocal(bind=engine) as db:
+        return (
+            db.query(PlaceReviewSummary.place_id)
+            .order_by(PlaceReviewSummary.review_count.desc(), PlaceReviewSummary.place_id)
+            .limit(1)
+            .scalar()
+        )
+
+
+def heaviest_users(engine: Engine, limit: int = 1) -> List[int]:
+    with SessionLocal(bind=engine) as db:
+        return [
+            user_id for user_id, _ in
+            db.query(VisitedPlace.user_id, func.count(VisitedPlace.id))
+            .group_by(VisitedPlace.user_id)
+            .order_by(func.count(VisitedPlace.id).desc())
+            .limit(limit)
+            .all()
+        ]
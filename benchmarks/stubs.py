@@ -0,0 +1,97 @@
+from typing import List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.models.places import Place
+from app.utils.cluster import ClusterRecommendTable, resolve_place_ids
+from app.utils.collaborative import EmbeddingScorer, PlaceUniverse, place_vocabulary_size
+from app.utils.inference import BatchingPredictor
+from app.utils.registry import ModelBundle
+
+
+class StubKModes:
+    """
+    Stands in for the kmodes `c_model`: `labels_` for the training rows and a
+    deterministic `predict` over (isWeekend, season, sex, age_group) rows.
+    """
+
+    def __init__(self, tafp_df: pd.DataFrame, n_clusters: int = 8):
+        self.n_clusters = n_clusters
+        self.labels_ = self.predict(tafp_df[["isWeekend", "season", "sex", "age"]].to_numpy())
+
+    def predict(self, features: Sequence) -> np.ndarray:
+        features = np.asarray(features, dtype=np.int64).reshape(-1, 4)
+        return (features @ np.array([7, 5, 3, 11])) % self.n_clusters
+
+
+class Embedding:
+    def __init__(self, weights: np.ndarray):
+        self._weights = weights
+
+    def get_weights(self) -> List[np.ndarray]:
+        return [self._weights]
+
+
+class StubCFModel:
+    """
+    Stands in for the Keras `cf_model`: inputs are [user ids, place ids, visit
+    counts], the score is a user/place embedding dot product plus bias. With a
+    non-zero `visit_weight` the visit count input changes the ranking, so the
+    embedding scorer fails validation and the `model.predict` path is used.
+    """
+
+    def __init__(self, users: int, places: int, dim: int = 32, visit_weight: float = 0.0, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.user_embeddings = rng.normal(0, 0.1, (users, dim)).astype(np.float32)
+        self.place_embeddings = rng.normal(0, 0.1, (places, dim)).astype(np.float32)
+        self.place_bias = rng.normal(0, 0.05, (places, 1)).astype(np.float32)
+        self.visit_weight = visit_weight
+        self.user_bias = np.zeros((users, 1), dtype=np.float32)
+        # Ordered user, place, user, place: with no Keras inputs to match against,
+        # EmbeddingScorer.from_model assigns embedding layers by position.
+        self.layers = [
+            Embedding(self.user_embeddings), Embedding(self.place_embeddings),
+            Embedding(self.user_bias), Embedding(self.place_bias),
+        ]
+        self.inputs = []
+
+    def predict(self, inputs, batch_size: int = 32, verbose: int = 0) -> np.ndarray:
+        user_ids, place_ids, visit_counts = (np.asarray(x) for x in inputs)
+        scores = np.einsum("ij,ij->i", self.user_embeddings[user_ids], self.place_embeddings[place_ids])
+        scores += self.place_bias[place_ids, 0] + self.visit_weight * visit_counts
+        return scores[:, None]
+
+
+def stub_tafp_df(db, rows: int = 5000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    names = [name for (name,) in db.query(Place.name).order_by(Place.id).limit(rows).all()]
+    return pd.DataFrame({
+        "name": rng.choice(names, size=rows),
+        "isWeekend": rng.integers(0, 2, rows),
+        "season": rng.integers(0, 4, rows),
+        "sex": rng.integers(0, 2, rows),
+        "age": rng.integers(1, 7, rows),
+        "pop": rng.random(rows),
+    })
+
+
+def stub_bundle(db, users: int, places: int, visit_weight: float = 0.0, version: str = "stub") -> ModelBundle:
+    tafp_df = resolve_place_ids(db, stub_tafp_df(db))
+    c_model = StubKModes(tafp_df)
+    cf_model = StubCFModel(users + 1, places + 1, visit_weight=visit_weight)
+
+    cf_universe = PlaceUniverse.from_db(db, place_vocabulary_size(cf_model))
+    scorer = EmbeddingScorer.from_model(cf_model)
+    cf_scorer = scorer if scorer is not None and scorer.validate(cf_model, cf_universe.model_indices) else None
+
+    return ModelBundle(
+        version=version,
+        c_model=c_model,
+        cf_model=cf_model,
+        tafp_df=tafp_df,
+        cluster_table=ClusterRecommendTable(c_model, tafp_df),
+        cf_predictor=BatchingPredictor(cf_model),
+        cf_scorer=cf_scorer,
+        cf_universe=cf_universe,
+    )
@@ -0,0 +1,38 @@
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import event
+
+# app.database builds its engine from AWS_RDS_URL at import time, so point it at
+# a throwaway SQLite file before anything from app is imported.
+TEST_DB_DIR = tempfile.mkdtemp(prefix="back-end-tests-")
+os.environ["AWS_RDS_URL"] = f"sqlite:///{os.path.join(TEST_DB_DIR, 'test.db')}"
+
+from app.database import SessionLocal, engine  # noqa: E402
+from app.utils.cache import place_cache  # noqa: E402
+from benchmarks.seed import seed  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def dataset():
+    return seed(engine, places=500, users=50, visits=2000, reviews=1000)
+
+
+@pytest.fixture
+def db(dataset):
+    place_cache.clear()
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def statements():
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
@@ -0,0 +1,61 @@
+import os
+from types import SimpleNamespace
+
+import huggingface_hub
+import pytest
+
+from app.utils.artifacts import Artifact, load_artifacts, read_manifest
+
+SHAS = ["a" * 40, "b" * 40]
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    state = {"sha": SHAS[0], "online": True, "downloads": []}
+
+    def model_info(self, repo_id, revision=None, token=None):
+        if not state["online"]:
+            raise OSError("hub unreachable")
+        return SimpleNamespace(sha=state["sha"] if revision == "main" else revision)
+
+    def hf_hub_download(repo_id, filename, revision, token, local_dir):
+        state["downloads"].append((repo_id, filename, revision))
+        path = os.path.join(local_dir, filename)
+        with open(path, "w") as f:
+            f.write(revision)
+        return path
+
+    monkeypatch.setattr(huggingface_hub.HfApi, "model_info", model_info)
+    monkeypatch.setattr(huggingface_hub, "hf_hub_download", hf_hub_download)
+    return state
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def test_artifacts_are_cached_per_resolved_commit(tmp_path, hub):
+    artifacts = [Artifact("model", "owner/model", "model.bin", read), Artifact("data", "owner/model", "data.csv", read)]
+
+    values, timings = load_artifacts(artifacts, artifact_dir=str(tmp_path))
+    assert values == {"model": SHAS[0], "data": SHAS[0]}
+    assert {timing["revision"] for timing in timings.values()} == {SHAS[0]}
+    assert len(hub["downloads"]) == 2
+
+    _, timings = load_artifacts(artifacts, artifact_dir=str(tmp_path))
+    assert {timing["source"] for timing in timings.values()} == {"local"}
+
+    # main moved: the new commit is downloaded instead of serving the cached one.
+    hub["sha"] = SHAS[1]
+    values, _ = load_artifacts(artifacts, artifact_dir=str(tmp_path))
+    assert values == {"model": SHAS[1], "data": SHAS[1]}
+    assert len(hub["downloads"]) == 4
+
+    hub["online"] = False
+    values, timings = load_artifacts(artifacts, artifact_dir=str(tmp_path))
+    assert values == {"model": SHAS[1], "data": SHAS[1]}
+    assert read_manifest(str(tmp_path))[os.path.join("owner--model", "refs", "main")] == SHAS[1]
+
+    with pytest.raises(OSError):
+        load_artifacts(artifacts, artifact_dir=str(tmp_path), revision="v2")
@@ -0,0 +1,72 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.routers import search as search_router
+from app.utils.autocomplete import MAX_SUGGESTIONS, AutocompleteIndex, Suggestion
+
+SUGGESTIONS = [
+    Suggestion("스타벅스 홍대점", "place", 1, 10.0),
+    Suggestion("스타벅스 신촌점", "place", 2, 30.0),
+    Suggestion("서브웨이 홍대점", "place", 3, 20.0),
+    Suggestion("아메리카노", "menu", None, 50.0),
+    Suggestion("BBQ 신촌점", "place", 4, 5.0),
+]
+
+
+def texts(suggestions):
+    return [suggestion.text for suggestion in suggestions]
+
+
+@pytest.fixture
+def index():
+    return AutocompleteIndex(SUGGESTIONS)
+
+
+def test_prefixes_match_names_and_word_starts(index):
+    assert texts(index.complete("스타")) == ["스타벅스 신촌점", "스타벅스 홍대점"]
+    assert texts(index.complete("홍대")) == ["서브웨이 홍대점", "스타벅스 홍대점"]
+    assert texts(index.complete("bbq")) == ["BBQ 신촌점"]
+    assert index.complete("없는") == []
+    assert index.complete(" ") == []
+
+
+def test_chosung_queries_match_initial_consonants(index):
+    assert texts(index.complete("ㅅㅌ")) == ["스타벅스 신촌점", "스타벅스 홍대점"]
+    assert texts(index.complete("ㅅㅊ")) == ["스타벅스 신촌점", "BBQ 신촌점"]
+    assert texts(index.complete("ㅇㅁ")) == ["아메리카노"]
+
+
+def test_suggestions_are_ordered_by_popularity(index):
+    assert texts(index.complete("ㅅ")) == ["스타벅스 신촌점", "서브웨이 홍대점", "스타벅스 홍대점", "BBQ 신촌점"]
+    assert texts(index.complete("ㅅ", k=2)) == ["스타벅스 신촌점", "서브웨이 홍대점"]
+    assert texts(index.complete("스")) == ["스타벅스 신촌점", "스타벅스 홍대점"]
+
+
+@pytest.mark.parametrize("prefix", ["ㅅ", "ㄱ", "스", "카", "b", "1"])
+def test_short_prefixes_rank_like_a_full_scan(db, prefix):
+    index = AutocompleteIndex.from_db(db)
+    # Asking for more than MAX_SUGGESTIONS bypasses the rankings built up front.
+    scanned = index.complete(prefix, MAX_SUGGESTIONS + 1)[:MAX_SUGGESTIONS]
+    assert index.complete(prefix, MAX_SUGGESTIONS) == scanned
+    assert index.complete(prefix, 3) == scanned[:3]
+
+
+def test_route_answers_from_the_index_without_queries(db, statements):
+    app = FastAPI()
+    app.include_router(search_router.router)
+    app.state.autocomplete_index = AutocompleteIndex.from_db(db)
+
+    async def get(path):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path)
+
+    statements.clear()
+    response = asyncio.run(get("/search/autocomplete/ㅅ?size=5"))
+
+    assert response.status_code == 200
+    assert len(response.json()) == 5
+    assert statements == []
@@ -0,0 +1,43 @@
+import pytest
+
+from app.crud.places import get_places_details
+from app.utils.cache import (
+    PLACE_CACHE_MODELS,
+    LocalCacheBackend,
+    LRUCache,
+    ModelSerializer,
+    TieredCache,
+)
+
+
+def worker_cache(shared):
+    return TieredCache("place", LRUCache(), shared, ModelSerializer(PLACE_CACHE_MODELS))
+
+
+def test_shared_tier_stores_json_and_returns_models(db):
+    shared = LocalCacheBackend()
+    first, second = worker_cache(shared), worker_cache(shared)
+
+    details = get_places_details(db, [1, 2])
+    first.set_many({f"details:{place.basic_info.id}": place for place in details})
+
+    stored = shared.get_many(["place:details:1"])[0]
+    assert stored.startswith(b"{")
+    assert second.get_many(["details:1", "details:2"]) == {
+        f"details:{place.basic_info.id}": place for place in details
+    }
+    assert second.stats()["shared_hits"] == 2
+
+
+def test_undecodable_shared_entries_are_misses():
+    shared = LocalCacheBackend()
+    shared.set_many({"place:coordinates:1": b"\x80\x04not json"})
+    cache = worker_cache(shared)
+
+    assert cache.get("coordinates:1") is None
+    assert cache.stats()["shared_errors"] == 1
+
+
+def test_shared_tier_requires_a_serializer():
+    with pytest.raises(ValueError):
+        TieredCache("place", LRUCache(), LocalCacheBackend())
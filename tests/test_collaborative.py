@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.main import refresh_indexes
+from app.models.places import Place, PlaceRanking
+from app.utils.collaborative import EmbeddingScorer, PlaceUniverse, place_vocabulary_size, top_k_indices
+from app.utils.content import PlaceFeatures
+from app.utils.search_index import SearchIndex
+from benchmarks.stubs import StubCFModel
+
+USERS, PLACES = 50, 500
+
+
+def predict(model, user_id, place_ids, visit_counts=None):
+    visit_counts = np.zeros(len(place_ids)) if visit_counts is None else visit_counts
+    return model.predict([np.full(len(place_ids), user_id), place_ids, visit_counts], verbose=0).ravel()
+
+
+def test_top_k_indices_matches_a_full_sort():
+    scores = np.random.default_rng(0).normal(size=1000).astype(np.float32)
+    assert top_k_indices(scores, 20).tolist() == np.argsort(-scores, kind="stable")[:20].tolist()
+    assert top_k_indices(scores[:5], 20).tolist() == np.argsort(-scores[:5], kind="stable").tolist()
+
+
+def test_scorer_matches_model_predict():
+    model = StubCFModel(USERS, PLACES)
+    scorer = EmbeddingScorer.from_model(model)
+    place_ids = np.arange(1, PLACES)
+
+    assert scorer is not None
+    for user_id in (1, 17, USERS - 1):
+        expected = predict(model, user_id, place_ids)
+        actual = scorer.scores(user_id, place_ids)
+        np.testing.assert_allclose(actual, expected, rtol=1e-5, atol=1e-6)
+        assert top_k_indices(actual, 20).tolist() == top_k_indices(expected, 20).tolist()
+    assert scorer.validate(model, place_ids)
+
+
+def test_scorer_is_rejected_when_visits_change_the_ranking():
+    model = StubCFModel(USERS, PLACES, visit_weight=0.5)
+    scorer = EmbeddingScorer.from_model(model)
+    assert not scorer.validate(model, np.arange(1, PLACES))
+
+
+def test_universe_is_bounded_by_the_place_embedding(db):
+    model = StubCFModel(USERS, 100, visit_weight=0.5)
+    assert place_vocabulary_size(model) == 100
+
+    universe = PlaceUniverse.from_db(db, place_vocabulary_size(model))
+    assert len(universe) > 0
+    assert universe.place_ids.max() < 100
+    assert universe.unscorable > 0
+    model.predict([np.zeros(len(universe), dtype=np.int64), universe.model_indices, universe.visit_counts({})])
+
+
+def test_refresh_picks_up_new_places_and_drops_cached_scores(db):
+    universe = PlaceUniverse.from_db(db, 1000)
+    place_ids, _ = universe.snapshot()
+    universe.store_scores((1,), place_ids, np.zeros(len(place_ids)))
+    assert universe.cached_scores((1,), place_ids) is not None
+
+    place_id = 900
+    db.add(Place(
+        id=place_id, name="CF 갱신 테스트점", street_address="서울 마포구", category_id=210, pos_x=37.55, pos_y=126.92
+    ))
+    db.commit()
+    try:
+        state = SimpleNamespace(
+            place_features=PlaceFeatures(),
+            search_index=SearchIndex(),
+            autocomplete_index=None,
+            registry=SimpleNamespace(active=SimpleNamespace(cf_universe=universe)),
+        )
+        timings = {}
+        refresh_indexes(SimpleNamespace(state=state), timings)
+
+        refreshed, model_indices = universe.snapshot()
+        assert "cf_universe" in timings
+        assert place_id in refreshed and place_id in model_indices
+        assert len(refreshed) == len(place_ids) + 1
+        assert universe.cached_scores((1,), refreshed) is None
+        # Scores computed for the place ids from before the refresh are not cached.
+        universe.store_scores((1,), place_ids, np.zeros(len(place_ids)))
+        assert universe.cached_scores((1,), place_ids) is None
+        assert universe.cached_scores((1,), refreshed) is None
+    finally:
+        db.query(PlaceRanking).filter(PlaceRanking.place_id == place_id).delete()
+        db.query(Place).filter(Place.id == place_id).delete()
+        db.commit()
+
+
+def test_scorer_matches_a_keras_model():
+    keras = pytest.importorskip("tensorflow").keras
+
+    user, place, visits = keras.Input((1,)), keras.Input((1,)), keras.Input((1,))
+    user_vector = keras.layers.Flatten()(keras.layers.Embedding(USERS, 8)(user))
+    place_vector = keras.layers.Flatten()(keras.layers.Embedding(PLACES, 8)(place))
+    user_bias = keras.layers.Flatten()(keras.layers.Embedding(USERS, 1)(user))
+    place_bias = keras.layers.Flatten()(keras.layers.Embedding(PLACES, 1)(place))
+    score = keras.layers.Add()([keras.layers.Dot(axes=1)([user_vector, place_vector]), user_bias, place_bias])
+    model = keras.Model([user, place, visits], score)
+
+    assert place_vocabulary_size(model) == PLACES
+    scorer = EmbeddingScorer.from_model(model)
+    place_ids = np.arange(PLACES)
+    np.testing.assert_allclose(scorer.scores(3, place_ids), predict(model, 3, place_ids), rtol=1e-4, atol=1e-5)
@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import event
+
+from app.database import engine
+from app.routers import places
+from app.utils.cache import place_cache
+
+QUERY_LATENCY = 0.02
+
+
+def slow_query(conn, cursor, statement, parameters, context, executemany):
+    # Stands in for an RDS round trip; blocks whichever thread runs the query.
+    time.sleep(QUERY_LATENCY)
+
+
+async def fetch(app: FastAPI, paths, concurrently: bool) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        started = time.perf_counter()
+        if concurrently:
+            responses = await asyncio.gather(*(client.get(path) for path in paths))
+        else:
+            responses = [await client.get(path) for path in paths]
+        elapsed = time.perf_counter() - started
+    assert [response.status_code for response in responses] == [200] * len(paths)
+    return elapsed
+
+
+def test_requests_overlap_while_waiting_on_the_database(dataset):
+    app = FastAPI()
+    app.include_router(places.router)
+    paths = [f"/places/{place_id}" for place_id in range(1, 9)]
+
+    event.listen(engine, "before_cursor_execute", slow_query)
+    try:
+        place_cache.clear()
+        sequential = asyncio.run(fetch(app, paths, concurrently=False))
+        place_cache.clear()
+        concurrent = asyncio.run(fetch(app, paths, concurrently=True))
+    finally:
+        event.remove(engine, "before_cursor_execute", slow_query)
+
+    assert concurrent < sequential / 3
@@ -0,0 +1,80 @@
+import pytest
+
+from app.crud import places
+from app.schemas.places import ContentBasedRecommedRequest
+from app.utils.content import PlaceFeatures
+from app.utils.spatial import haversine
+from app.utils.visit_buffer import VisitBuffer
+from benchmarks.seed import CENTER_LATITUDE, CENTER_LONGITUDE
+
+# Ids the filter_by_category/filter_by_dist/filter_by_score queries returned for
+# the same requests on the test dataset, before they were replaced by
+# PlaceFeatures. Duplicates are expected: subcategories that map to the same
+# category each take their own quota from the same rows.
+CASES = {
+    # One quota per visited subcategory, ordered by ranking within each.
+    "quotas": (14, CENTER_LATITUDE, CENTER_LONGITUDE, 20, (), [
+        469, 363, 307, 108, 92, 148, 357, 392, 229, 414, 64, 236, 108, 92, 148, 197, 297, 62,
+    ]),
+    # Most places are more than 10 km away from the southern edge of the data.
+    "distance": (14, 37.45, 126.94, 20, (), [
+        116, 80, 83, 143, 217, 100, 357, 229, 453, 414, 124, 134, 143, 217, 100, 197, 352, 174,
+    ]),
+    # Buffered visits are excluded and count towards the visited subcategories.
+    "buffered": (14, CENTER_LATITUDE, CENTER_LONGITUDE, 20, (469, 108, 500), [
+        363, 307, 284, 92, 148, 68, 92, 148, 68, 357, 392, 229, 414, 64, 236, 92, 148, 68, 197, 297, 62,
+    ]),
+    # A user without visits gets the 10 best ranked places.
+    "no_visits": (10 ** 6, CENTER_LATITUDE, CENTER_LONGITUDE, 10, (), [
+        197, 297, 357, 392, 108, 414, 62, 241, 235, 64,
+    ]),
+    # Nothing within 10 km: the 10 best ranked places the user has not visited.
+    "nothing_nearby": (14, 35.18, 129.07, 10, (), [
+        197, 297, 357, 392, 108, 414, 62, 241, 235, 64,
+    ]),
+}
+
+
+@pytest.fixture
+def features(db):
+    return PlaceFeatures.from_db(db)
+
+
+@pytest.fixture
+def buffer(monkeypatch):
+    buffer = VisitBuffer()
+    monkeypatch.setattr(places, "visit_buffer", buffer)
+    return buffer
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_recommendations_match_the_query_based_filters(db, features, buffer, case):
+    user_id, latitude, longitude, top_n, pending, expected = CASES[case]
+    for place_id in pending:
+        buffer.add(user_id, place_id)
+    payload = ContentBasedRecommedRequest(user_id=user_id, latitude=latitude, longitude=longitude, top_n=top_n)
+
+    recommended = places.get_content_based_recommend(db, "all", payload, features)
+
+    assert [place.basic_info.id for place in recommended] == expected
+    assert not set(expected) & set(pending)
+
+
+def test_quota_rows_are_nearby_and_not_visited(features):
+    ids, lats, lons, _ = features._state
+    nearby = {
+        int(place_id) for place_id, distance in zip(ids, haversine(37.45, 126.94, lats, lons))
+        if distance < 10
+    }
+
+    selected = features.recommend(37.45, 126.94, [116, 80], [([210], 5), ([220], 0)])
+
+    assert len(selected) == 5
+    assert set(selected) <= nearby - {116, 80}
+
+
+def test_fallback_takes_the_best_unvisited_rows(features):
+    ids = features._state[0].tolist()
+
+    assert features.recommend(35.18, 129.07, [], [([210], 5)]) == ids[:10]
+    assert features.recommend(CENTER_LATITUDE, CENTER_LONGITUDE, ids[:3], []) == ids[3:13]
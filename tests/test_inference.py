@@ -0,0 +1,98 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.utils.inference import BatchingPredictor, InferenceQueueFull, InferenceTimeout
+
+
+class SumModel:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.release = threading.Event()
+        self.release.set()
+
+    def predict(self, inputs, batch_size=32, verbose=0):
+        self.release.wait()
+        time.sleep(self.delay)
+        return np.sum(inputs, axis=0)[:, None]
+
+
+def predict_concurrently(predictor, inputs):
+    results = [None] * len(inputs)
+
+    def run(index):
+        try:
+            results[index] = predictor.predict(inputs[index], timeout=5)
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(len(inputs))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_batches_are_split_back_per_request():
+    predictor = BatchingPredictor(SumModel(), max_batch_size=4, max_wait=0.05)
+    try:
+        results = predict_concurrently(predictor, [[np.arange(n), np.ones(n)] for n in (1, 2, 3)])
+        for n, result in zip((1, 2, 3), results):
+            np.testing.assert_array_equal(result.ravel(), np.arange(n) + 1)
+    finally:
+        predictor.close()
+
+
+def test_a_bad_batch_fails_its_requests_and_keeps_the_executor_alive():
+    predictor = BatchingPredictor(SumModel(), max_batch_size=2, max_wait=0.2)
+    try:
+        results = predict_concurrently(predictor, [
+            [np.ones((2, 2)), np.ones((2, 2))],
+            [np.ones(2), np.ones(2)],
+        ])
+        assert all(isinstance(result, ValueError) for result in results)
+        assert predictor._thread.is_alive()
+        assert predictor.stats()["errors"] == 1
+
+        np.testing.assert_array_equal(predictor.predict([np.ones(2), np.ones(2)]).ravel(), [2, 2])
+    finally:
+        predictor.close()
+
+
+def test_predict_times_out_with_the_default_timeout():
+    model = SumModel()
+    model.release.clear()
+    predictor = BatchingPredictor(model, timeout=0.1)
+    try:
+        with pytest.raises(InferenceTimeout):
+            predictor.predict([np.ones(1), np.ones(1)])
+        assert predictor.stats()["timeouts"] == 1
+    finally:
+        model.release.set()
+        predictor.close()
+
+
+def test_close_does_not_block_on_a_full_queue():
+    model = SumModel()
+    model.release.clear()
+    predictor = BatchingPredictor(model, max_batch_size=1, max_queue_size=2, timeout=5)
+    requests = threading.Thread(
+        target=predict_concurrently, args=(predictor, [[np.ones(1), np.ones(1)]] * 4)
+    )
+    requests.start()
+    time.sleep(0.1)
+
+    closer = threading.Thread(target=predictor.close)
+    closer.start()
+    time.sleep(0.1)
+    model.release.set()
+    closer.join(timeout=2)
+    requests.join(timeout=2)
+
+    assert not closer.is_alive()
+    assert not requests.is_alive()
+    with pytest.raises(InferenceQueueFull):
+        predictor.predict([np.ones(1), np.ones(1)])
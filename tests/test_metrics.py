@@ -0,0 +1,41 @@
+import asyncio
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.utils.metrics import metrics
+
+app = FastAPI()
+
+
+@app.get("/idle")
+def idle(db: Session = Depends(get_db)):
+    return {}
+
+
+@app.get("/query")
+def query(db: Session = Depends(get_db)):
+    return {"value": db.execute(text("SELECT 1")).scalar()}
+
+
+def get(path: str) -> int:
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return (await client.get(path)).status_code
+
+    return asyncio.run(run())
+
+
+def test_connections_are_checked_out_only_for_queries(dataset):
+    checkouts, waits = metrics._totals["checkouts"], metrics._pool_wait.count
+    assert get("/idle") == 200
+    assert metrics._totals["checkouts"] == checkouts
+    assert metrics._pool_wait.count == waits
+
+    assert get("/query") == 200
+    assert metrics._totals["checkouts"] == checkouts + 1
+    assert metrics._pool_wait.count == waits + 1
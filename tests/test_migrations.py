@@ -0,0 +1,53 @@
+from sqlalchemy import create_engine, inspect, text
+
+from app.database import Base
+from app.migrations import MIGRATIONS, applied_migrations, migrate, pending_migrations
+
+
+def test_migrate_creates_the_schema_once(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+
+    assert pending_migrations(engine) == MIGRATIONS
+    assert migrate(engine) == MIGRATIONS
+    assert set(Base.metadata.tables) <= set(inspect(engine).get_table_names())
+    assert applied_migrations(engine) == MIGRATIONS
+
+    assert migrate(engine) == []
+    assert pending_migrations(engine) == []
+
+
+def test_migrate_adds_columns_missing_from_existing_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE menu (id INTEGER PRIMARY KEY, place_id INTEGER NOT NULL,"
+            " menu VARCHAR(255) NOT NULL, price INTEGER NOT NULL)"
+        ))
+        conn.execute(text("INSERT INTO menu (id, place_id, menu, price) VALUES (1, 1, '김밥', 3000)"))
+
+    migrate(engine)
+
+    assert "version" in {column["name"] for column in inspect(engine).get_columns("menu")}
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT version FROM menu")).scalar() == 1
+
+
+def test_migrate_merges_duplicate_visits_before_the_unique_index(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'visits.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE visited_place (id INTEGER PRIMARY KEY, place_id INTEGER NOT NULL,"
+            " user_id INTEGER NOT NULL, visit_count INTEGER)"
+        ))
+        conn.execute(text(
+            "INSERT INTO visited_place (id, user_id, place_id, visit_count)"
+            " VALUES (1, 1, 1, 2), (2, 1, 1, NULL), (3, 1, 1, 4), (4, 1, 2, 1)"
+        ))
+
+    migrate(engine)
+
+    indexes = {index["name"]: index for index in inspect(engine).get_indexes("visited_place")}
+    assert indexes["ux_visited_place_user_place"]["unique"]
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, place_id, visit_count FROM visited_place ORDER BY id")).all()
+    assert [tuple(row) for row in rows] == [(1, 1, 7), (4, 2, 1)]
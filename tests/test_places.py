@@ -0,0 +1,170 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.database import engine
+from app.crud.places import count_places, get_places, get_places_by_name, get_places_details, sync_place_ranking
+from app.models.places import KakaoPlace, NaverPlace, Place, PlaceRanking
+from app.crud.visitedplaces import get_visited_place_by_user
+from app.routers import places as places_router
+from app.schemas.places import MAX_BATCH_SIZE
+from app.utils.cache import place_cache
+from benchmarks.seed import heaviest_users
+
+
+def request(method, path, **kwargs):
+    app = FastAPI()
+    app.include_router(places_router.router)
+
+    async def send():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.request(method, path, **kwargs)
+
+    return asyncio.run(send())
+
+
+def count(statements, load):
+    place_cache.clear()
+    statements.clear()
+    result = load()
+    return len(statements), result
+
+
+@pytest.mark.parametrize("sort_by", ["name", "score", "review_count"])
+def test_get_places_query_count_does_not_depend_on_page_size(db, statements, sort_by):
+    small, places = count(statements, lambda: get_places(db, sort_by, "desc", 0, 1))
+    large, more_places = count(statements, lambda: get_places(db, sort_by, "desc", 0, 50))
+
+    assert len(places) == 1
+    assert len(more_places) == 50
+    assert small == large
+
+
+def test_get_places_by_name_query_count_does_not_depend_on_page_size(db, statements):
+    small, _ = count(statements, lambda: get_places_by_name(db, "asc", 0, 1))
+    large, places = count(statements, lambda: get_places_by_name(db, "asc", 0, 50))
+
+    assert len(places) == 50
+    assert small == large
+
+
+def test_get_places_details_keeps_input_order(db):
+    place_ids = [42, 7, 300, 1, 7]
+    places = get_places_details(db, place_ids + [10 ** 9])
+
+    assert [place.basic_info.id for place in places[:-1]] == place_ids
+    assert places[-1] is None
+
+
+def test_visited_places_query_count_does_not_depend_on_visit_count(db, statements):
+    heavy_user, = heaviest_users(engine)
+    light, few_places = count(statements, lambda: get_visited_place_by_user(db, 50))
+    heavy, places = count(statements, lambda: get_visited_place_by_user(db, heavy_user))
+
+    assert 0 < len(few_places) < len(places) / 4
+    assert light == heavy
+
+
+def test_count_places_matches_the_listing_and_new_places_get_ranked(db, dataset):
+    db.add(Place(id=10 ** 6, name="새 장소", street_address="서울 마포구", category_id=210, pos_x=37.56, pos_y=126.94))
+    db.commit()
+    try:
+        assert count_places(db, "name") == dataset["places"] + 1
+        assert count_places(db, "score") == dataset["places"]
+        assert len(get_places(db, "score", "asc", 0, dataset["places"] + 10)) == dataset["places"]
+
+        assert sync_place_ranking(db) == 1
+        assert count_places(db, "score") == dataset["places"] + 1
+        assert sync_place_ranking(db) == 0
+    finally:
+        db.query(PlaceRanking).filter(PlaceRanking.place_id == 10 ** 6).delete()
+        db.query(Place).filter(Place.id == 10 ** 6).delete()
+        db.commit()
+
+
+def test_score_changes_are_re_ranked(db):
+    def top_ids():
+        return [place.basic_info.id for place in get_places(db, "score", "desc", 0, 10)]
+
+    assert sync_place_ranking(db) == 0
+    before = top_ids()
+    place_id = before[-1]
+    naver_places = db.query(NaverPlace).filter(NaverPlace.place_id == place_id).all()
+    kakao_places = db.query(KakaoPlace).filter(KakaoPlace.place_id == place_id).all()
+    old_scores = [place.score for place in naver_places + kakao_places]
+    assert naver_places or kakao_places
+
+    for place in naver_places + kakao_places:
+        place.score = 100.0
+    db.commit()
+    try:
+        assert top_ids() == before
+        assert sync_place_ranking(db) == 1
+        assert top_ids()[0] == place_id
+        assert sync_place_ranking(db) == 0
+    finally:
+        for place, score in zip(naver_places + kakao_places, old_scores):
+            place.score = score
+        db.commit()
+        sync_place_ranking(db)
+    assert top_ids() == before
+
+
+def test_etag_and_body_change_together_when_a_loader_updates_scores(db):
+    naver_place = db.query(NaverPlace).filter(NaverPlace.score.isnot(None)).order_by(NaverPlace.id).first()
+    place_id, old_score = naver_place.place_id, naver_place.score
+
+    first = request("GET", f"/places/{place_id}")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert request("GET", f"/places/{place_id}", headers={"If-None-Match": etag}).status_code == 304
+
+    # Written like the external loader does: no invalidate_places.
+    naver_place.score = old_score + 0.1
+    db.commit()
+    try:
+        second = request("GET", f"/places/{place_id}", headers={"If-None-Match": etag})
+        assert second.status_code == 200
+        assert second.headers["ETag"] != etag
+        assert second.json()["naver_info"]["score"] == pytest.approx(old_score + 0.1)
+    finally:
+        naver_place.score = old_score
+        db.commit()
+
+
+def test_content_recommendations_are_unavailable_until_place_features_are_built(dataset):
+    payload = {"user_id": 1, "latitude": 37.5598, "longitude": 126.9425, "top_n": 10}
+    response = request("POST", "/places/recommend/content/all", json=payload)
+    assert response.status_code == 503
+
+
+@pytest.mark.parametrize("path", ["/places/batch", "/places/batch/coordinates"])
+def test_batch_items_follow_the_request_order(dataset, path):
+    place_cache.clear()
+    place_ids = [7, 3, 10 ** 6, 3, 1, 10 ** 6 + 1, 7]
+    body = request("POST", path, json={"place_ids": place_ids}).json()
+
+    assert len(body["items"]) == len(place_ids)
+    assert body["missing"] == [10 ** 6, 10 ** 6 + 1]
+    assert [item is None for item in body["items"]] == [place_id > 500 for place_id in place_ids]
+    assert body["items"][1] == body["items"][3] and body["items"][0] == body["items"][6]
+    if path == "/places/batch":
+        assert [item["basic_info"]["id"] for item in body["items"] if item] == [7, 3, 3, 1, 7]
+
+
+@pytest.mark.parametrize("path", ["/places/batch", "/places/batch/coordinates"])
+def test_batch_query_count_does_not_depend_on_batch_size(dataset, statements, path):
+    def post(place_ids):
+        place_cache.clear()
+        statements.clear()
+        response = request("POST", path, json={"place_ids": place_ids})
+        assert response.status_code == 200
+        assert not response.json()["missing"]
+        return len(statements)
+
+    assert post([1]) == post(list(range(1, MAX_BATCH_SIZE + 1)))
+    assert request("POST", path, json={"place_ids": list(range(MAX_BATCH_SIZE + 1))}).status_code == 422
+    assert request("POST", path, json={"place_ids": []}).status_code == 422
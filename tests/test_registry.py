@@ -0,0 +1,86 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.routers import models
+from app.utils.registry import ModelLoadInProgress, ModelRegistry
+
+
+class Bundle:
+    def __init__(self, version):
+        self.version = version
+        self.timings = {}
+        self.loaded_at = 0.0
+
+    def warmup(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SlowBuild:
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, version):
+        self.started.set()
+        assert self.release.wait(5)
+        return Bundle(version)
+
+
+def test_reload_is_refused_while_startup_loads():
+    build = SlowBuild()
+    registry = ModelRegistry(build)
+    startup = threading.Thread(target=registry.load, args=("v1",))
+    startup.start()
+    assert build.started.wait(5)
+
+    assert not registry.reload("v2")
+    with pytest.raises(ModelLoadInProgress):
+        registry.load("v2")
+    assert registry.status()["loading_version"] == "v1"
+
+    build.release.set()
+    startup.join(5)
+    assert registry.active.version == "v1"
+    assert registry.loading is None
+
+
+def test_history_is_capped():
+    registry = ModelRegistry(Bundle, history_size=5)
+    for version in range(20):
+        registry.load(str(version))
+    assert [entry["version"] for entry in registry.history] == ["15", "16", "17", "18", "19"]
+
+
+def post_reload(monkeypatch, token=None, versions=(), **headers):
+    monkeypatch.setattr(models, "MODEL_ADMIN_TOKEN", token)
+    monkeypatch.setattr(models, "MODEL_VERSIONS", set(versions))
+    app = FastAPI()
+    app.include_router(models.router)
+    app.state.registry = ModelRegistry(Bundle)
+
+    async def post():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/models/reload?version=v2", headers=headers)
+
+    return asyncio.run(post()).status_code
+
+
+def test_reload_requires_the_admin_token(monkeypatch):
+    assert post_reload(monkeypatch) == 403
+    assert post_reload(monkeypatch, token="secret") == 401
+    assert post_reload(monkeypatch, token="secret", **{"X-Admin-Token": "wrong"}) == 401
+    assert post_reload(monkeypatch, token="secret", **{"X-Admin-Token": "secret"}) == 202
+
+
+def test_reload_only_loads_allowed_versions(monkeypatch):
+    headers = {"X-Admin-Token": "secret"}
+    assert post_reload(monkeypatch, token="secret", versions=["v1"], **headers) == 400
+    assert post_reload(monkeypatch, token="secret", versions=["v1", "v2"], **headers) == 202
@@ -0,0 +1,31 @@
+from app.crud.reviews import create_review, delete_review, get_review_summary
+from app.models.places import Place
+from app.models.reviews import PlaceReviewSummary, Review
+from app.schemas.reviews import ReviewsCreateRequest
+
+
+def test_first_reviews_create_the_summary_and_later_ones_update_it(db):
+    place_id = 10 ** 6 + 2
+    db.add(Place(
+        id=place_id, name="리뷰 요약점", street_address="서울 마포구", category_id=210, pos_x=37.55, pos_y=126.92
+    ))
+    db.commit()
+    try:
+        first = create_review(db, ReviewsCreateRequest(place_id=place_id, user_id=None, comment="좋아요", score=4.8))
+        create_review(db, ReviewsCreateRequest(place_id=place_id, user_id=None, comment="보통", score=3.0))
+        create_review(db, ReviewsCreateRequest(place_id=place_id, user_id=None, comment="점수 없음", score=None))
+
+        summary = get_review_summary(db, place_id)
+        assert summary.review_count == 3
+        assert summary.average_score == (4.8 + 3.0) / 2
+        assert summary.histogram == {1: 0, 2: 0, 3: 1, 4: 0, 5: 1}
+
+        assert delete_review(db, first.id)
+        summary = get_review_summary(db, place_id)
+        assert summary.review_count == 2
+        assert summary.histogram == {1: 0, 2: 0, 3: 1, 4: 0, 5: 0}
+    finally:
+        db.query(Review).filter(Review.place_id == place_id).delete()
+        db.query(PlaceReviewSummary).filter(PlaceReviewSummary.place_id == place_id).delete()
+        db.query(Place).filter(Place.id == place_id).delete()
+        db.commit()
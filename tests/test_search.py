@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.crud.search import search_keyword
+from app.main import refresh_indexes
+from app.models.menus import Menu
+from app.models.places import Place, PlaceRanking
+from app.utils.content import PlaceFeatures
+from app.utils.search_index import SearchIndex
+
+KEYWORDS = ["스타벅스", "bbq", "BBQ", "홍대", "1호점", "김밥", "라떼", "치킨", "카페", "떡", "q", "없는가게", ""]
+
+
+def results(db, keyword, index=None):
+    responses, total = search_keyword(db, keyword, 0, 10 ** 6, index)
+    assert total == len(responses)
+    return {(response.place_id, response.place_name, tuple(response.menus)) for response in responses}
+
+
+@pytest.mark.parametrize("keyword", KEYWORDS)
+def test_index_matches_the_like_query(db, keyword):
+    index = SearchIndex.from_db(db)
+    assert results(db, keyword, index) == results(db, keyword)
+
+
+def test_refresh_picks_up_new_places_and_menus(db):
+    state = SimpleNamespace(place_features=PlaceFeatures(), search_index=SearchIndex(), autocomplete_index=None)
+    refresh_indexes(SimpleNamespace(state=state), {})
+    assert results(db, "인덱스갱신", state.search_index) == set()
+
+    place_id = 10 ** 6 + 1
+    db.add(Place(
+        id=place_id, name="인덱스갱신 테스트점", street_address="서울 마포구", category_id=210, pos_x=37.55, pos_y=126.92
+    ))
+    db.add(Menu(id=place_id, place_id=place_id, menu="인덱스갱신 라떼", price=5000))
+    db.commit()
+    try:
+        timings = {}
+        refresh_indexes(SimpleNamespace(state=state), timings)
+        assert results(db, "인덱스갱신", state.search_index) == results(db, "인덱스갱신")
+        assert {"place_ranking", "place_features", "search_index", "autocomplete_index"} <= timings.keys()
+        assert [suggestion.place_id for suggestion in state.autocomplete_index.complete("인덱스갱신", 10)]
+    finally:
+        db.query(Menu).filter(Menu.id == place_id).delete()
+        db.query(PlaceRanking).filter(PlaceRanking.place_id == place_id).delete()
+        db.query(Place).filter(Place.id == place_id).delete()
+        db.commit()
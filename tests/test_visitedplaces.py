@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import tuple_
+
+from app.crud import visitedplaces as crud
+from app.crud.visitedplaces import upsert_visits
+from app.database import engine
+from app.models.visitedplaces import VisitedPlace
+from app.schemas.visitedplaces import VisitedPlaceCreateRequest
+
+
+def unvisited_pair(db, user_id=1):
+    visited = {place_id for (place_id,) in db.query(VisitedPlace.place_id).filter_by(user_id=user_id).all()}
+    return user_id, min(set(range(1, 500)) - visited)
+
+
+@pytest.mark.parametrize("dialect", ["sqlite", "portable"])
+def test_upsert_visits_increments_and_inserts(db, monkeypatch, dialect):
+    if dialect == "portable":
+        # A dialect name without an upsert statement takes the SELECT + UPDATE/INSERT path.
+        monkeypatch.setattr(engine.dialect, "name", "generic")
+
+    stored = db.query(VisitedPlace).order_by(VisitedPlace.id).first()
+    existing_pair, stored_count = (stored.user_id, stored.place_id), stored.visit_count or 0
+    new_pair = unvisited_pair(db)
+    try:
+        upsert_visits(db, {existing_pair: 2, new_pair: 3})
+        upsert_visits(db, {new_pair: 1})
+        counts = {
+            (user_id, place_id): visit_count
+            for user_id, place_id, visit_count in db.query(
+                VisitedPlace.user_id, VisitedPlace.place_id, VisitedPlace.visit_count
+            ).filter(tuple_(VisitedPlace.user_id, VisitedPlace.place_id).in_([existing_pair, new_pair]))
+        }
+        assert counts == {existing_pair: stored_count + 2, new_pair: 4}
+    finally:
+        db.rollback()
+
+
+@pytest.fixture
+def buffered(db):
+    buffer = crud.visit_buffer
+    buffer.start(lambda visits: crud.flush_visits(db, visits))
+    yield buffer
+    buffer.close()
+
+
+def test_buffered_visit_survives_a_flush_between_the_reads(db, buffered, monkeypatch):
+    user_id, place_id = unvisited_pair(db, user_id=2)
+    get_visits = crud.get_visits
+
+    def read_then_flush(db, pairs):
+        # The flusher commits right after the table was read: the visit is in
+        # neither the rows read nor the buffer any more.
+        visits = get_visits(db, pairs)
+        buffered.flush()
+        return visits
+
+    monkeypatch.setattr(crud, "get_visits", read_then_flush)
+    try:
+        visit = crud.add_visited_place(db, VisitedPlaceCreateRequest(user_id=user_id, place_id=place_id))
+        assert (visit.user_id, visit.place_id) == (user_id, place_id)
+        assert visit.visit_count == 1
+    finally:
+        db.query(VisitedPlace).filter_by(user_id=user_id, place_id=place_id).delete()
+        db.commit()
+
+
+@pytest.mark.parametrize("user_id, place_id", [(10 ** 6, 1), (1, 10 ** 6)])
+def test_unknown_ids_are_not_buffered(db, buffered, user_id, place_id):
+    assert crud.add_visited_place(db, VisitedPlaceCreateRequest(user_id=user_id, place_id=place_id)) is None
+    assert buffered.pending(user_id) == {}